@@ -5,18 +5,32 @@ Configuration loading with layered precedence:
   3. Repo-local:   .claudex/config.toml  (highest priority)
 
 All config is read-only at runtime; create/edit the TOML files manually.
+Loaded config is memoized and only re-read when a TOML file's stat changes.
 """
 
 from __future__ import annotations
 
-import tomllib
-from typing import Any
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
 
 from .state import REPO_CONFIG_FILE, USER_CONFIG_FILE
 
 # ── Defaults ──────────────────────────────────────────────────────────────────
 
-DEFAULT_CONFIG: dict[str, Any] = {
+
+def _freeze(value: Any) -> Any:
+    """Wrap every nested dict in a read-only MappingProxyType and turn lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+# Frozen so it can be returned as-is when no config file overrides it
+DEFAULT_CONFIG: Mapping[str, Any] = _freeze({
     # Providers tried in this order; first available one wins
     "provider_order": ["claude", "codex"],
 
@@ -49,12 +63,22 @@ DEFAULT_CONFIG: dict[str, Any] = {
         "backoff_base": 2.0,
         # Cap for a single backoff wait
         "backoff_max": 30.0,
+        # Full jitter: sleep a random time in [0, backoff wait] so parallel
+        # claudex processes don't retry a rate-limited provider in lock-step;
+        # also spreads the default quota cooldown by ±10%
+        "jitter": True,
         # How long (minutes) to cool down a QUOTA_EXHAUSTED provider
         "cooldown_minutes": 60,
         # How long (minutes) to cool down after exhausted transient retries
         "transient_cooldown_minutes": 5,
     },
 
+    "state": {
+        # fsync each turn's .claudex/ writes once the turn is saved, so a
+        # crash or power loss can't lose it; off by default for speed
+        "fsync": False,
+    },
+
     "switch": {
         # ask | yes | no
         # - ask: prompt before failover
@@ -62,51 +86,163 @@ DEFAULT_CONFIG: dict[str, Any] = {
         # - no: never switch automatically
         "confirmation": "ask",
     },
-}
+})
+
+
+# ── Typed sections ────────────────────────────────────────────────────────────
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
+@dataclass(slots=True, frozen=True)
+class RetryConfig:
+    """The [retry] section, resolved once per routing call."""
+    max_retries: int
+    backoff_base: float
+    backoff_max: float
+    jitter: bool
+    cooldown_minutes: int
+    transient_cooldown_minutes: int
+
+    @classmethod
+    def from_dict(cls, config: Mapping[str, Any]) -> RetryConfig:
+        retry = config.get("retry", _EMPTY)
+        defaults = DEFAULT_CONFIG["retry"]
+        return cls(
+            max_retries=retry.get("max_retries", defaults["max_retries"]),
+            backoff_base=retry.get("backoff_base", defaults["backoff_base"]),
+            backoff_max=retry.get("backoff_max", defaults["backoff_max"]),
+            jitter=retry.get("jitter", defaults["jitter"]),
+            cooldown_minutes=retry.get("cooldown_minutes", defaults["cooldown_minutes"]),
+            transient_cooldown_minutes=retry.get(
+                "transient_cooldown_minutes", defaults["transient_cooldown_minutes"]
+            ),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class LimitsConfig:
+    """The [limits] section used by snapshot and handoff generation."""
+    max_diff_lines: int
+    max_diff_bytes: int
+    max_handoff_lines: int
+
+    @classmethod
+    def from_dict(cls, config: Mapping[str, Any]) -> LimitsConfig:
+        limits = config.get("limits", _EMPTY)
+        defaults = DEFAULT_CONFIG["limits"]
+        return cls(
+            max_diff_lines=limits.get("max_diff_lines", defaults["max_diff_lines"]),
+            max_diff_bytes=limits.get("max_diff_bytes", defaults["max_diff_bytes"]),
+            max_handoff_lines=limits.get("max_handoff_lines", defaults["max_handoff_lines"]),
+        )
 
 
 # ── Loader ────────────────────────────────────────────────────────────────────
 
+# (st_dev, st_ino, st_mtime_ns, st_size) — changes whenever a file is edited
+_FileSignature = tuple[int, int, int, int]
 
-def _deep_merge(base: dict, override: dict) -> dict:
-    """Recursively merge `override` into `base`, returning a new dict."""
+# Parsed TOML per file, reused until the file's signature changes
+_FILE_CACHE: dict[Path, tuple[_FileSignature, dict[str, Any]]] = {}
+
+# Last merged config, keyed on the signatures of both config files
+_MERGED_CACHE: Optional[tuple[tuple, Mapping[str, Any]]] = None
+
+
+def _merge_config(base: Mapping[str, Any], override: Mapping[str, Any]) -> dict[str, Any]:
+    """
+    Merge `override` into `base` in a single iterative pass, returning a new dict.
+    Only tables that `override` touches are copied; the rest are shared with `base`.
+    """
     result = dict(base)
-    for k, v in override.items():
-        if k in result and isinstance(result[k], dict) and isinstance(v, dict):
-            result[k] = _deep_merge(result[k], v)
-        else:
-            result[k] = v
+    pending: list[tuple[dict[str, Any], Mapping[str, Any]]] = [(result, override)]
+    while pending:
+        target, source = pending.pop()
+        for k, v in source.items():
+            current = target.get(k)
+            if isinstance(current, Mapping) and isinstance(v, Mapping):
+                table = dict(current)
+                target[k] = table
+                pending.append((table, v))
+            else:
+                target[k] = v
     return result
 
 
-def _load_toml_file(path) -> dict[str, Any]:
+def _file_signature(path: Path) -> Optional[_FileSignature]:
+    """Return the stat signature of `path`, or None if it cannot be stat'ed."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _load_toml_file(path, signature: Optional[_FileSignature] = None) -> dict[str, Any]:
     """
-    Load a TOML file into a dict.
+    Load a TOML file into a dict, reusing the cached parse while `signature` matches.
     Returns {} if the file cannot be read or parsed.
     """
+    if signature is not None:
+        cached = _FILE_CACHE.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+    # Deferred: only needed when a config file actually has to be parsed.
+    import tomllib
+
     try:
         with path.open("rb") as f:
             loaded = tomllib.load(f)
-            return loaded if isinstance(loaded, dict) else {}
+            loaded = loaded if isinstance(loaded, dict) else {}
     except (OSError, tomllib.TOMLDecodeError):
-        return {}
+        loaded = {}
 
+    if signature is not None:
+        _FILE_CACHE[path] = (signature, loaded)
+    return loaded
 
-def load_config() -> dict[str, Any]:
+
+def load_config() -> Mapping[str, Any]:
     """
-    Return the merged configuration dict.
+    Return the merged configuration as a read-only mapping.
     Keys from higher-priority sources override lower ones (but nested dicts merge).
+
+    The result is memoized: repeated calls cost two stat() calls and return
+    the same object until either config file changes on disk.
     """
-    config = dict(DEFAULT_CONFIG)
+    global _MERGED_CACHE
+
+    user_sig = _file_signature(USER_CONFIG_FILE)
+    repo_sig = _file_signature(REPO_CONFIG_FILE)
+    key = (USER_CONFIG_FILE, user_sig, REPO_CONFIG_FILE, repo_sig)
+    if _MERGED_CACHE is not None and _MERGED_CACHE[0] == key:
+        return _MERGED_CACHE[1]
+
+    config: Mapping[str, Any] = DEFAULT_CONFIG
 
     # User-global config (lower priority)
-    if USER_CONFIG_FILE.exists():
-        user_cfg = _load_toml_file(USER_CONFIG_FILE)
-        config = _deep_merge(config, user_cfg)
+    if user_sig is not None:
+        user_cfg = _load_toml_file(USER_CONFIG_FILE, user_sig)
+        if user_cfg:
+            config = _merge_config(config, user_cfg)
 
     # Repo-local config (highest priority)
-    if REPO_CONFIG_FILE.exists():
-        repo_cfg = _load_toml_file(REPO_CONFIG_FILE)
-        config = _deep_merge(config, repo_cfg)
-
-    return config
+    if repo_sig is not None:
+        repo_cfg = _load_toml_file(REPO_CONFIG_FILE, repo_sig)
+        if repo_cfg:
+            config = _merge_config(config, repo_cfg)
+
+    # Without overrides the frozen defaults are returned directly, uncopied.
+    frozen = config if config is DEFAULT_CONFIG else _freeze(config)
+    _MERGED_CACHE = (key, frozen)
+    return frozen
+
+
+def reload_config() -> Mapping[str, Any]:
+    """Drop all cached config and re-read the TOML files from disk."""
+    global _MERGED_CACHE
+    _FILE_CACHE.clear()
+    _MERGED_CACHE = None
+    return load_config()
@@ -12,14 +12,61 @@ the previous one left off.
 
 from __future__ import annotations
 
+import os
+import re
 import subprocess
+import threading
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Mapping, Optional
+
+from .config import LimitsConfig
+
+# Hard limit for any single git invocation
+_GIT_TIMEOUT_SECONDS = 10
+
+# handoff.md layout; filled with str.format_map so only the output string is built
+_HANDOFF_TEMPLATE = """\
+# Claudex Handoff
+
+*Last updated: {now} — Provider: {provider}*
+
+## Current Goal
+
+{goal}
+
+## Current Plan
+
+{plan}
+
+## What Changed This Turn
+
+**User asked:**
+{user}
+
+**{provider} responded:**
+{response}
+
+## Open Questions / Blockers
+
+{blockers}
+
+## Next Concrete Steps
+
+(Derive from the assistant response above and update this section.)
+"""
+
+# Working directories already confirmed to be inside a git work tree
+_known_work_trees: set[str] = set()
+
+_NOT_ESTABLISHED = "(not yet established — infer from the exchange below)"
+
+# One level-2 Markdown section: "## Header" line, then everything up to the next one
+_SECTION_RE = re.compile(r"^## ([^\n]*)\n?(.*?)(?=^## |\Z)", re.MULTILINE | re.DOTALL)
 
 # ── Git snapshot ──────────────────────────────────────────────────────────────
 
 
-def get_repo_snapshot(config: dict) -> str:
+def get_repo_snapshot(config: Mapping[str, Any]) -> str:
     """
     Build a compact Markdown git snapshot for context injection.
 
@@ -31,30 +78,36 @@ def get_repo_snapshot(config: dict) -> str:
 
     Returns an empty string if we're not in a git repo.
     """
-    limits = config.get("limits", {})
-    max_diff_lines: int = limits.get("max_diff_lines", 200)
-    max_diff_bytes: int = limits.get("max_diff_bytes", 8_000)
+    limits = LimitsConfig.from_dict(config)
+    max_diff_lines = limits.max_diff_lines
+    max_diff_bytes = limits.max_diff_bytes
 
     # Quick check: are we in a git repo at all?
-    if not _run_git(["git", "rev-parse", "--is-inside-work-tree"]):
+    if not _is_inside_work_tree():
         return ""
 
     parts: list[str] = ["## Repo Snapshot\n"]
 
-    status = _run_git(["git", "status", "--porcelain"])
+    # These are independent, so start them all at once and overlap git startup.
+    status, log, diff_stat, numstat = _run_git_batch(
+        [
+            ["git", "status", "--porcelain"],
+            ["git", "log", "-n", "5", "--oneline"],
+            ["git", "diff", "--stat"],
+            ["git", "diff", "--numstat"],
+        ]
+    )
+
     if status:
         parts.append("**Status:**\n```\n" + status.strip() + "\n```\n")
 
-    log = _run_git(["git", "log", "-n", "5", "--oneline"])
     if log:
         parts.append("**Recent commits:**\n```\n" + log.strip() + "\n```\n")
 
-    diff_stat = _run_git(["git", "diff", "--stat"])
     if diff_stat:
         parts.append("**Diff stat:**\n```\n" + diff_stat.strip() + "\n```\n")
 
     # Avoid fetching the full patch if numstat already shows it exceeds line limits.
-    numstat = _run_git(["git", "diff", "--numstat"])
     estimated_lines = _estimate_changed_lines(numstat)
     if estimated_lines is not None and estimated_lines > max_diff_lines:
         parts.append(
@@ -62,12 +115,20 @@ def get_repo_snapshot(config: dict) -> str:
             f"the {max_diff_lines}-line limit). Inspect individual files as needed.\n"
         )
     else:
-        diff = _run_git(["git", "diff"])
-        if diff:
-            n_lines = len(diff.splitlines())
-            n_bytes = len(diff.encode("utf-8"))
+        # Stop reading as soon as the patch exceeds the byte budget.
+        diff = _run_git(["git", "diff"], max_bytes=max_diff_bytes)
+        if diff is None:
+            parts.append(
+                f"**Full diff omitted** (exceeds the {max_diff_bytes}-byte limit). "
+                "Inspect individual files as needed.\n"
+            )
+        elif diff:
+            # Size checks run on the raw bytes; decode only if the diff is kept.
+            n_lines = diff.count(b"\n")
+            n_bytes = len(diff)
             if n_lines <= max_diff_lines and n_bytes <= max_diff_bytes:
-                parts.append("**Full diff:**\n```diff\n" + diff.strip() + "\n```\n")
+                text = diff.decode("utf-8", errors="replace")
+                parts.append("**Full diff:**\n```diff\n" + text.strip() + "\n```\n")
             else:
                 parts.append(
                     f"**Full diff omitted** ({n_lines} lines, {n_bytes} bytes). "
@@ -82,7 +143,7 @@ def get_repo_snapshot(config: dict) -> str:
 
 def build_provider_prompt(
     user_prompt: str,
-    config: dict,
+    config: Mapping[str, Any],
     is_resuming: bool = False,
     handoff_content: Optional[str] = None,
 ) -> str:
@@ -123,8 +184,9 @@ def update_handoff(
     user_prompt: str,
     assistant_text: str,
     provider: str,
-    config: dict,
+    config: Mapping[str, Any],
     previous_handoff: Optional[str] = None,
+    now: Optional[datetime] = None,
 ) -> str:
     """
     Generate a fresh handoff.md that captures the current session state.
@@ -140,61 +202,104 @@ def update_handoff(
     We preserve the Goal / Plan / Blockers sections from the previous handoff
     so context isn't lost when the file is overwritten.
     """
-    limits = config.get("limits", {})
-    max_lines: int = limits.get("max_handoff_lines", 350)
+    max_lines = LimitsConfig.from_dict(config).max_handoff_lines
 
-    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+    stamp = (now or datetime.now(timezone.utc)).strftime("%Y-%m-%d %H:%M UTC")
 
     # Carry forward structured sections from the previous handoff if available
-    prev_goal = _extract_section(previous_handoff or "", "Current Goal")
-    prev_plan = _extract_section(previous_handoff or "", "Current Plan")
-    prev_blockers = _extract_section(previous_handoff or "", "Open Questions / Blockers")
-
-    content = f"""\
-# Claudex Handoff
-
-*Last updated: {now} — Provider: {provider}*
-
-## Current Goal
+    sections = _parse_sections(previous_handoff or "")
+    prev_goal = _lookup_section(sections, "Current Goal")
+    prev_plan = _lookup_section(sections, "Current Plan")
+    prev_blockers = _lookup_section(sections, "Open Questions / Blockers")
+
+    content = _HANDOFF_TEMPLATE.format_map(
+        {
+            "now": stamp,
+            "provider": provider,
+            "goal": prev_goal or _NOT_ESTABLISHED,
+            "plan": prev_plan or _NOT_ESTABLISHED,
+            "user": _truncate(user_prompt, 600),
+            "response": _truncate(assistant_text, 2000),
+            "blockers": prev_blockers or "(none noted yet)",
+        }
+    )
 
-{prev_goal or "(not yet established — infer from the exchange below)"}
+    return _enforce_line_limit(content, max_lines)
 
-## Current Plan
 
-{prev_plan or "(not yet established — infer from the exchange below)"}
+# ── Helpers ───────────────────────────────────────────────────────────────────
 
-## What Changed This Turn
 
-**User asked:**
-{_truncate(user_prompt, 600)}
+def _run_git(cmd: list[str], max_bytes: Optional[int] = None) -> Optional[bytes]:
+    """
+    Run a git subcommand, return raw stdout on success or b"" on failure.
 
-**{provider} responded:**
-{_truncate(assistant_text, 2000)}
+    When max_bytes is set, stdout is read into a bounded buffer and the process
+    is killed as soon as the output grows past the limit; None is returned in
+    that case so callers never hold an oversized diff in memory.
+    """
+    return _collect_git(_start_git(cmd), max_bytes)
 
-## Open Questions / Blockers
 
-{prev_blockers or "(none noted yet)"}
+def _is_inside_work_tree() -> bool:
+    """
+    Return True if the CWD is inside a git work tree.
+    Only positive answers are remembered, so `git init` mid-session is seen.
+    """
+    cwd = os.getcwd()
+    if cwd in _known_work_trees:
+        return True
+    if not _run_git(["git", "rev-parse", "--is-inside-work-tree"]):
+        return False
+    _known_work_trees.add(cwd)
+    return True
 
-## Next Concrete Steps
 
-(Derive from the assistant response above and update this section.)
-"""
+def _run_git_batch(cmds: list[list[str]]) -> list[str]:
+    """
+    Run several git subcommands concurrently and return their outputs in order.
+    All processes are spawned before any output is read, so the per-process
+    startup cost overlaps instead of adding up.
+    """
+    procs = [_start_git(cmd) for cmd in cmds]
+    return [
+        (_collect_git(proc) or b"").decode("utf-8", errors="replace")
+        for proc in procs
+    ]
 
-    return _enforce_line_limit(content, max_lines)
 
+def _start_git(cmd: list[str]) -> Optional[subprocess.Popen]:
+    try:
+        return subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+    except Exception:
+        return None
 
-# ── Helpers ───────────────────────────────────────────────────────────────────
 
+def _collect_git(
+    proc: Optional[subprocess.Popen],
+    max_bytes: Optional[int] = None,
+) -> Optional[bytes]:
+    if proc is None:
+        return b""
 
-def _run_git(cmd: list[str]) -> str:
-    """Run a git subcommand, return stdout on success or empty string on failure."""
+    timer = threading.Timer(_GIT_TIMEOUT_SECONDS, proc.kill)
+    timer.start()
     try:
-        result = subprocess.run(
-            cmd, capture_output=True, text=True, timeout=10
-        )
-        return result.stdout if result.returncode == 0 else ""
+        with proc:
+            limit = -1 if max_bytes is None else max_bytes + 1
+            out = proc.stdout.read(limit)
+            if max_bytes is not None and len(out) > max_bytes:
+                proc.kill()
+                return None
+            returncode = proc.wait()
     except Exception:
-        return ""
+        return b""
+    finally:
+        timer.cancel()
+
+    return out if returncode == 0 else b""
 
 
 def _estimate_changed_lines(numstat_output: str) -> Optional[int]:
@@ -224,31 +329,48 @@ def _estimate_changed_lines(numstat_output: str) -> Optional[int]:
     return total if parsed_any else None
 
 
+def _parse_sections(text: str) -> dict[str, str]:
+    """
+    Split a Markdown document into {header: body} for every level-2 section
+    in a single regex pass. When a header repeats, the first one wins.
+    """
+    sections: dict[str, str] = {}
+    for match in _SECTION_RE.finditer(text):
+        sections.setdefault(match.group(1).strip(), match.group(2).strip())
+    return sections
+
+
+def _lookup_section(sections: dict[str, str], section_name: str) -> str:
+    """
+    Return the body for `section_name`, or "" if absent.
+    Headers match by prefix, so "## Current Goal (revised)" still counts.
+    """
+    body = sections.get(section_name)
+    if body is not None:
+        return body
+    for header, body in sections.items():
+        if header.startswith(section_name):
+            return body
+    return ""
+
+
 def _extract_section(text: str, section_name: str) -> str:
     """
     Extract the body of a level-2 Markdown section (## Section Name).
     Returns an empty string if the section is not found.
     """
-    lines = text.splitlines()
-    in_section = False
-    body: list[str] = []
-    for line in lines:
-        if line.startswith(f"## {section_name}"):
-            in_section = True
-            continue
-        if in_section:
-            if line.startswith("## "):
-                break
-            body.append(line)
-    return "\n".join(body).strip()
+    return _lookup_section(_parse_sections(text), section_name)
 
 
 def _truncate(text: str, max_chars: int) -> str:
-    """Truncate text to max_chars, appending a note about how much was dropped."""
-    if len(text) <= max_chars:
+    """
+    Truncate text to max_chars, appending a note about how much was dropped.
+    str slicing copies only the kept prefix, so this is O(max_chars) for any input.
+    """
+    length = len(text)
+    if length <= max_chars:
         return text
-    dropped = len(text) - max_chars
-    return text[:max_chars] + f"\n…[{dropped} chars truncated]"
+    return f"{text[:max_chars]}\n…[{length - max_chars} chars truncated]"
 
 
 def _enforce_line_limit(text: str, max_lines: int) -> str:
@@ -257,17 +379,37 @@ def _enforce_line_limit(text: str, max_lines: int) -> str:
     We keep the top third and bottom two-thirds so that the current-goal
     header and the next-steps footer are both preserved.
     """
-    lines = text.splitlines()
-    if len(lines) <= max_lines:
+    # Fast path: n newlines means at most n + 1 lines.
+    newlines = text.count("\n")
+    if newlines < max_lines:
         return text
 
-    keep_top = max_lines // 3
-    keep_bottom = max_lines - keep_top - 3
-    dropped = len(lines) - keep_top - keep_bottom
+    # A trailing newline ends the last line rather than starting a new one.
+    end = len(text) - 1 if text.endswith("\n") else len(text)
+    n_lines = newlines + (end == len(text))
+    if n_lines <= max_lines:
+        return text
 
-    trimmed = (
-        lines[:keep_top]
-        + ["", f"[… {dropped} lines omitted to stay within the {max_lines}-line limit …]", ""]
-        + lines[-keep_bottom:]
+    # Kept lines come out LF-terminated, as splitlines() + join would give.
+    if "\r" in text:
+        text = text.replace("\r\n", "\n")
+        end = len(text) - 1 if text.endswith("\n") else len(text)
+
+    keep_top = max_lines // 3
+    keep_bottom = max(max_lines - keep_top - 3, 0)
+    dropped = n_lines - keep_top - keep_bottom
+
+    # Find the kept head and tail by newline offsets and slice them out directly.
+    head_end = -1
+    for _ in range(keep_top):
+        head_end = text.find("\n", head_end + 1)
+    tail_start = end
+    for _ in range(keep_bottom):
+        tail_start = text.rfind("\n", 0, tail_start)
+
+    head = text[:head_end] + "\n" if keep_top else ""
+    tail = "\n" + text[tail_start + 1:end] if keep_bottom else ""
+    return (
+        f"{head}\n[… {dropped} lines omitted to stay within the "
+        f"{max_lines}-line limit …]\n{tail}"
     )
-    return "\n".join(trimmed)
@@ -13,27 +13,28 @@ Commands
 
 from __future__ import annotations
 
+from collections import ChainMap
 from datetime import datetime, timezone
 from enum import Enum
+from functools import lru_cache
 import os
 from pathlib import Path
+import re
 import shlex
 import stat
 import sys
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Mapping, Optional
 
 import typer
-from rich.console import Console
-from rich.markdown import Markdown
-from rich.panel import Panel
-from rich.table import Table
 
+# Rich, the router and the handoff/transcript writers are imported inside
+# the functions that use them so `claudex status`, wrapper launches and
+# install/uninstall don't pay for them at startup.
 from .config import load_config
-from .handoff import update_handoff
-from .models import Provider, ProviderState
-from .router import get_available_providers, run_with_retry
+from .models import ActiveRun, Provider, ProviderState
 from .state import (
     CLAUDEX_DIR,
+    StateWriteBatch,
     clear_active_run,
     clear_claudex,
     load_active_run,
@@ -43,7 +44,9 @@ from .state import (
     save_handoff,
     save_state,
 )
-from .transcript import record_turn
+
+if TYPE_CHECKING:
+    from rich.console import Console
 
 # ── Typer app ─────────────────────────────────────────────────────────────────
 
@@ -54,88 +57,154 @@ app = typer.Typer(
     add_completion=False,
 )
 
-console = Console()
-err_console = Console(stderr=True)
+
+@lru_cache(maxsize=1)
+def _get_consoles() -> tuple[Console, Console]:
+    """Return the (stdout, stderr) consoles, importing rich on first use."""
+    from rich.console import Console
+
+    return Console(), Console(stderr=True)
 
 
 WRAPPER_MARKER = "CLAUDEX_WRAPPER"
+_WRAPPER_MARKER_BYTES = WRAPPER_MARKER.encode()
+_WRAPPER_HEAD_BYTES = 64
+_WRAPPER_MAX_BYTES = 16 * 1024
 DEFAULT_WRAPPER_DIR = Path.home() / ".claudex" / "bin"
 
 
+_UTC = timezone.utc
+_CHAT_PROMPT = "\n[bold cyan]you>[/bold cyan] "
+_EXIT_WORDS = frozenset({"exit", "quit", "/exit", "/quit"})
+
+
 class AutoSwitchPolicy(str, Enum):
     ASK = "ask"
     YES = "yes"
     NO = "no"
 
 
-def _format_cooldown(ps: ProviderState, now: datetime) -> str:
-    if not (ps.cooldown_until and ps.cooldown_until > now):
-        return "—"
+_NO_COOLDOWN = ("—", "—", "—")
+_STATUS_HEADERS = (
+    "Provider",
+    "Status",
+    "Session ID",
+    "Last Used",
+    "Cooldown",
+    "Cooldown Until",
+    "Cooldown Source",
+)
+_STATUS_COLUMNS = (
+    "provider",
+    "status",
+    "session_id",
+    "last_used",
+    "cooldown",
+    "cooldown_until",
+    "cooldown_source",
+)
 
-    remaining = ps.cooldown_until - now
-    mins = max(0, int(remaining.total_seconds() / 60))
-    return f"[yellow]{mins} min[/yellow]"
 
+def _cooldown_fields(ps: ProviderState, now: datetime) -> tuple[str, str, str]:
+    """
+    Return (remaining, until, source) display strings for a provider's
+    cooldown, or dashes when it is not cooling down.
+    """
+    until = ps.cooldown_until
+    if not (until and until > now):
+        return _NO_COOLDOWN
 
-def _format_cooldown_until(ps: ProviderState, now: datetime) -> str:
-    if not (ps.cooldown_until and ps.cooldown_until > now):
-        return "—"
-    until_utc = ps.cooldown_until.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
-    until_local = ps.cooldown_until.astimezone().strftime("%Y-%m-%d %H:%M %Z")
-    return f"{until_utc} / {until_local}"
+    mins = max(0, int((until - now).total_seconds() / 60))
+    until_utc = until.astimezone(_UTC).strftime("%Y-%m-%d %H:%M UTC")
+    until_local = until.astimezone().strftime("%Y-%m-%d %H:%M %Z")
+    return f"{mins} min", f"{until_utc} / {until_local}", ps.cooldown_source or "unknown"
 
 
-def _format_cooldown_source(ps: ProviderState, now: datetime) -> str:
-    if not (ps.cooldown_until and ps.cooldown_until > now):
-        return "—"
-    return ps.cooldown_source or "unknown"
+_YES_TOKENS = frozenset({"yes", "always", "true", "1"})
+_NO_TOKENS = frozenset({"no", "never", "false", "0"})
 
 
-def _coerce_auto_switch(value: object) -> AutoSwitchPolicy:
-    raw = str(value or "").strip().lower()
-    if raw in ("yes", "always", "true", "1"):
+@lru_cache(maxsize=8)
+def _coerce_auto_switch(value: str) -> AutoSwitchPolicy:
+    if isinstance(value, AutoSwitchPolicy):
+        return value
+    raw = value.strip().lower()
+    if raw in _YES_TOKENS:
         return AutoSwitchPolicy.YES
-    if raw in ("no", "never", "false", "0"):
+    if raw in _NO_TOKENS:
         return AutoSwitchPolicy.NO
     return AutoSwitchPolicy.ASK
 
 
 def _resolve_auto_switch(
     explicit: Optional[AutoSwitchPolicy],
-    config: dict,
+    config: Mapping[str, Any],
 ) -> AutoSwitchPolicy:
     if explicit is not None:
         return explicit
     switch_cfg = config.get("switch", {})
-    return _coerce_auto_switch(switch_cfg.get("confirmation", AutoSwitchPolicy.ASK.value))
+    value = switch_cfg.get("confirmation")
+    if not isinstance(value, str):
+        value = str(value or "")
+    return _coerce_auto_switch(value)
 
 
 def _with_preferred_provider(
-    config: dict,
+    config: Mapping[str, Any],
     preferred_provider: Optional[Provider],
-) -> dict:
+) -> Mapping[str, Any]:
     if preferred_provider is None:
         return config
 
-    ordered = [preferred_provider.value]
-    configured = config.get("provider_order", ["claude", "codex"])
-    for name in configured:
-        if name not in ordered and name in {Provider.CLAUDE.value, Provider.CODEX.value}:
-            ordered.append(name)
+    # With exactly two providers the order is fully determined by the
+    # preferred one. Overlay it instead of copying the whole config.
+    if preferred_provider == Provider.CLAUDE:
+        ordered = (Provider.CLAUDE.value, Provider.CODEX.value)
+    else:
+        ordered = (Provider.CODEX.value, Provider.CLAUDE.value)
+    # Loaded config holds tuples, but a hand-built one may still use lists
+    if tuple(config.get("provider_order", ())) == ordered:
+        return config
+    return ChainMap({"provider_order": ordered}, config)
 
-    # Ensure both providers are present in case config omitted one.
-    if Provider.CLAUDE.value not in ordered:
-        ordered.append(Provider.CLAUDE.value)
-    if Provider.CODEX.value not in ordered:
-        ordered.append(Provider.CODEX.value)
 
-    merged = dict(config)
-    merged["provider_order"] = ordered
-    return merged
+_WORD_RE = re.compile(r"\S+")
+# Anything that could be Markdown syntax within a line: emphasis, code,
+# headings, links, tables, quotes, entities, escapes, list items, rules.
+_MARKDOWN_HINT_RE = re.compile(r"[`*_#\[|<>~&\\]|^\s*(?:[-+=]|\d+[.)])", re.MULTILINE)
+
+
+def _with_resolved_binaries(
+    config: Mapping[str, Any], wrapper_dir: Path
+) -> Mapping[str, Any]:
+    """
+    Overlay each provider's real binary path onto its config section so the
+    provider skips the PATH search (and any claudex wrapper hop) per turn.
+    Explicitly configured binaries are left alone.
+    """
+    overlay: dict[str, Mapping] = {}
+    for provider in Provider:
+        section = config.get(provider.value, {})
+        if section.get("binary"):
+            continue
+        binary = _real_binary_for_provider(provider, wrapper_dir)
+        if binary:
+            overlay[provider.value] = ChainMap({"binary": binary}, section)
+    return ChainMap(overlay, config) if overlay else config
 
 
 def _excerpt(text: str, max_len: int = 160) -> str:
-    normalized = " ".join(text.split())
+    # Pull words lazily and stop once past max_len, so a huge pasted prompt
+    # is neither split nor normalized beyond the part that is kept.
+    words: list[str] = []
+    size = -1
+    for match in _WORD_RE.finditer(text):
+        word = match.group()
+        words.append(word)
+        size += len(word) + 1
+        if size > max_len:
+            break
+    normalized = " ".join(words)
     if len(normalized) <= max_len:
         return normalized
     return normalized[:max_len] + "..."
@@ -146,7 +215,7 @@ def _excerpt(text: str, max_len: int = 160) -> str:
 
 def _run_turn(
     user_prompt: str,
-    config: dict,
+    config: Mapping[str, Any],
     *,
     preferred_provider: Optional[Provider] = None,
     auto_switch: Optional[AutoSwitchPolicy] = None,
@@ -163,6 +232,8 @@ def _run_turn(
 
     Returns (success, provider_used).
     """
+    from .router import run_with_retry
+
     state = load_state()
     handoff_content = load_handoff()
     turn_config = _with_preferred_provider(config, preferred_provider)
@@ -174,52 +245,54 @@ def _run_turn(
         "switch_prompt_decision": None,
     }
 
-    active_state = {
-        "pid": os.getpid(),
-        "mode": run_mode,
-        "started_at": datetime.now(timezone.utc).isoformat(),
-        "provider": None,
-        "prompt_excerpt": _excerpt(user_prompt),
-    }
-    save_active_run(active_state)
+    active_run = ActiveRun(
+        pid=os.getpid(),
+        mode=run_mode,
+        started_at=datetime.now(_UTC).isoformat(),
+        prompt_excerpt=_excerpt(user_prompt),
+    )
 
+    # active.json is written as soon as a provider is picked (never batched)
     def _on_provider_start(provider: Provider) -> None:
-        active_state["provider"] = provider.value
-        save_active_run(active_state)
+        active_run.provider = provider.value
+        save_active_run(active_run)
 
     def _confirm_switch(
         from_provider: Provider,
         to_provider: Provider,
         failed_result,
     ) -> bool:
+        err_console = _get_consoles()[1]
         reason = failed_result.error_class.value if failed_result.error_class else "ERROR"
-        switch_meta["switch_from"] = from_provider.value
-        switch_meta["switch_to"] = to_provider.value
+        from_name = from_provider.value
+        to_name = to_provider.value
+        switch_meta["switch_from"] = from_name
+        switch_meta["switch_to"] = to_name
 
         if switch_policy == AutoSwitchPolicy.YES:
             approved = True
             err_console.print(
-                f"\n[bold yellow]⚡ {from_provider.value} unavailable ({reason}) — "
-                f"switching to {to_provider.value}.[/bold yellow]\n"
+                f"\n[bold yellow]⚡ {from_name} unavailable ({reason}) — "
+                f"switching to {to_name}.[/bold yellow]\n"
             )
         elif switch_policy == AutoSwitchPolicy.NO:
             approved = False
             err_console.print(
-                f"\n[bold yellow]⚡ {from_provider.value} unavailable ({reason}) — "
+                f"\n[bold yellow]⚡ {from_name} unavailable ({reason}) — "
                 f"switch blocked by policy.[/bold yellow]\n"
             )
         else:
             if not sys.stdin.isatty():
                 approved = False
                 err_console.print(
-                    f"\n[bold yellow]⚡ {from_provider.value} unavailable ({reason}) — "
+                    f"\n[bold yellow]⚡ {from_name} unavailable ({reason}) — "
                     f"cannot prompt in non-interactive mode.[/bold yellow]\n"
                 )
             else:
                 approved = typer.confirm(
                     (
-                        f"⚡ {from_provider.value} unavailable ({reason}). "
-                        f"Switch to {to_provider.value} and continue?"
+                        f"⚡ {from_name} unavailable ({reason}). "
+                        f"Switch to {to_name} and continue?"
                     ),
                     default=False,
                 )
@@ -239,7 +312,37 @@ def _run_turn(
     finally:
         clear_active_run()
 
-    save_state(updated_state)
+    fsync = bool(turn_config.get("state", {}).get("fsync", False))
+    with StateWriteBatch(fsync=fsync):
+        return _finish_turn(
+            user_prompt,
+            result,
+            provider,
+            updated_state,
+            turn_config,
+            handoff_content,
+            switch_meta,
+        )
+
+
+def _finish_turn(
+    user_prompt: str,
+    result,
+    provider: Optional[Provider],
+    updated_state,
+    turn_config: Mapping[str, Any],
+    handoff_content: Optional[str],
+    switch_meta: dict[str, Optional[str]],
+) -> tuple[bool, Optional[Provider]]:
+    """Persist, render and log the outcome of a routed turn."""
+    from .handoff import update_handoff
+    from .transcript import record_turn
+
+    console, err_console = _get_consoles()
+
+    # One clock read stamps state.json, handoff.md and the transcript entry
+    now = datetime.now(_UTC)
+    save_state(updated_state, now=now)
 
     if result is None:
         err_console.print(
@@ -248,66 +351,80 @@ def _run_turn(
         )
         return False, None
 
+    provider_name = provider.value if provider else "?"
+    ps = updated_state.get_provider_state(provider) if provider else None
+    session_id = ps.session_id if ps else None
     if result.success:
         # Print which provider answered, then the response
-        console.print(f"\n[dim]◆ {provider.value}[/dim]\n")
-        console.print(Markdown(result.text or ""))
+        console.print(f"\n[dim]◆ {provider_name}[/dim]\n")
+        _print_response(result.text or "")
 
         # Update the rolling handoff summary
         new_handoff = update_handoff(
             user_prompt=user_prompt,
             assistant_text=result.text or "",
-            provider=provider.value,
+            provider=provider_name,
             config=turn_config,
             previous_handoff=handoff_content,
+            now=now,
         )
         save_handoff(new_handoff)
-
-        # Append success entry to transcript
-        ps = updated_state.get_provider_state(provider)
-        record_turn(
-            provider=provider,
-            user_prompt=user_prompt,
-            assistant_text=result.text,
-            session_id=ps.session_id,
-            cooldown_until=ps.cooldown_until,
-            cooldown_source=ps.cooldown_source,
-            cooldown_reason=ps.cooldown_reason,
-            switch_from=switch_meta["switch_from"],
-            switch_to=switch_meta["switch_to"],
-            switch_prompt_decision=switch_meta["switch_prompt_decision"],
+        error = None
+    else:
+        # Surface the classified error
+        err_class = result.error_class.value if result.error_class else None
+        err_console.print(
+            f"\n[bold red]✗ {provider_name} error[/bold red] "
+            f"[{err_class or 'UNKNOWN'}] "
+            f"{result.error_message}\n"
+        )
+        session_id = result.session_id or session_id
+        error = (
+            f"{err_class}: {result.error_message}"
+            if err_class
+            else str(result.error_message)
         )
-        return True, provider
 
-    # Surface the classified error
-    err_console.print(
-        f"\n[bold red]✗ {provider.value if provider else '?'} error[/bold red] "
-        f"[{result.error_class.value if result.error_class else 'UNKNOWN'}] "
-        f"{result.error_message}\n"
-    )
-    ps = updated_state.get_provider_state(provider) if provider else None
-    session_id = result.session_id or (ps.session_id if ps else None)
+    # One transcript entry per turn, success or failure
     record_turn(
         provider=provider,
         user_prompt=user_prompt,
-        assistant_text=None,
+        assistant_text=result.text if result.success else None,
         session_id=session_id,
         cooldown_until=ps.cooldown_until if ps else None,
         cooldown_source=ps.cooldown_source if ps else None,
         cooldown_reason=ps.cooldown_reason if ps else None,
-        error=(
-            f"{result.error_class.value}: {result.error_message}"
-            if result.error_class
-            else str(result.error_message)
-        ),
-        switch_from=switch_meta["switch_from"],
-        switch_to=switch_meta["switch_to"],
-        switch_prompt_decision=switch_meta["switch_prompt_decision"],
+        error=error,
+        now=now,
+        **switch_meta,
     )
-    return False, provider
+    return result.success, provider
+
+
+def _print_response(text: str) -> None:
+    """Render a response as Markdown on a terminal, or verbatim when piped."""
+    console = _get_consoles()[0]
+    if not console.is_terminal:
+        # Styling is dropped off-terminal anyway; skip the Markdown parse.
+        sys.stdout.write(text if text.endswith("\n") else text + "\n")
+        return
+    line = text.rstrip("\n")
+    if "\n" not in line and not line[:1].isspace() and not _MARKDOWN_HINT_RE.search(line):
+        # A single line of plain prose renders as Markdown would (Markdown
+        # only adds trailing padding), so skip the parser. Multi-line text
+        # always goes through it: paragraphs reflow, blank runs collapse
+        # and indented lines become code blocks.
+        console.print(line, markup=False, highlight=False)
+        return
+    from rich.markdown import Markdown
+
+    # The ANSI theme uses the terminal's own palette and avoids loading a
+    # Pygments style class on the first code block.
+    console.print(Markdown(text, code_theme="ansi_dark"))
 
 
 def _render_active_state(entry: Optional[dict]) -> None:
+    console = _get_consoles()[0]
     if not entry:
         console.print("[bold]Active turn:[/bold] none")
         return
@@ -319,54 +436,71 @@ def _render_active_state(entry: Optional[dict]) -> None:
     console.print(f"[bold]Prompt:[/bold]      {entry.get('prompt_excerpt', '—')}")
 
 
+# POSIX guarantees /bin/sh; `#!/usr/bin/env sh` would cost an extra exec
+# (plus a PATH search) on every claude/codex invocation. The marker stays in
+# the first few bytes so wrapper detection only needs to read the file head.
+_WRAPPER_HEADER = f"#!/bin/sh\n# {WRAPPER_MARKER}\nset -e\n"
+_WRAPPER_PASSTHROUGH = (
+    'if [ "${CLAUDEX_INNER_PROVIDER_CALL:-0}" = "1" ]; then\n'
+    '  exec "$REAL_PROVIDER_BIN" "$@"\n'
+    "fi\n"
+    # Keep native CLI behavior for standard option invocations.
+    'if [ "$#" -gt 0 ] && [ "${1#-}" != "$1" ]; then\n'
+    '  exec "$REAL_PROVIDER_BIN" "$@"\n'
+    "fi\n"
+)
+
+
+@lru_cache(maxsize=16)
 def _wrapper_script(
     preferred: Provider,
     real_provider_bin: Optional[str] = None,
 ) -> str:
-    preferred_name = preferred.value
-    lines = [
-        "#!/usr/bin/env sh",
-        f"# {WRAPPER_MARKER}",
-        "set -e",
-    ]
-
+    passthrough = ""
     if real_provider_bin:
-        quoted = shlex.quote(real_provider_bin)
-        lines.extend(
-            [
-                f"REAL_PROVIDER_BIN={quoted}",
-                'if [ "${CLAUDEX_INNER_PROVIDER_CALL:-0}" = "1" ]; then',
-                '  exec "$REAL_PROVIDER_BIN" "$@"',
-                "fi",
-                # Keep native CLI behavior for standard option invocations.
-                'if [ "$#" -gt 0 ] && [ "${1#-}" != "$1" ]; then',
-                '  exec "$REAL_PROVIDER_BIN" "$@"',
-                "fi",
-            ]
+        passthrough = (
+            f"REAL_PROVIDER_BIN={shlex.quote(real_provider_bin)}\n{_WRAPPER_PASSTHROUGH}"
         )
-
-    lines.extend(
-        [
-            f'exec claudex launch --prefer-provider {preferred_name} -- "$@"',
-        ]
+    return (
+        f"{_WRAPPER_HEADER}{passthrough}"
+        f'exec claudex launch --prefer-provider {preferred.value} -- "$@"\n'
     )
-    return "\n".join(lines) + "\n"
 
 
 def _write_wrapper(path: Path, content: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
-    current = path.stat().st_mode
-    path.chmod(current | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    exec_bits = stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+    # New files get 0755 (minus umask) at creation; only an existing file
+    # or a restrictive umask needs the follow-up fchmod.
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o755)
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(content.encode("utf-8"))
+        mode = os.fstat(fd).st_mode
+        if mode & exec_bits != exec_bits:
+            os.fchmod(fd, stat.S_IMODE(mode) | exec_bits)
+
+
+def _is_wrapper_file(path: str | Path, st: os.stat_result) -> bool:
+    """Return True if `path`, whose stat is `st`, is a claudex wrapper script."""
+    # Wrappers are a few hundred bytes; anything bigger (e.g. the real
+    # provider binary) is rejected without opening it.
+    if not stat.S_ISREG(st.st_mode) or st.st_size > _WRAPPER_MAX_BYTES:
+        return False
+    try:
+        # The marker sits on line 2 of every wrapper.
+        with open(path, "rb") as fh:
+            head = fh.read(_WRAPPER_HEAD_BYTES)
+    except OSError:
+        return False
+    return _WRAPPER_MARKER_BYTES in head
 
 
 def _is_claudex_wrapper(path: Path) -> bool:
     try:
-        if not path.exists() or not path.is_file():
-            return False
-        return WRAPPER_MARKER in path.read_text(encoding="utf-8", errors="ignore")
+        st = os.stat(path)
     except OSError:
         return False
+    return _is_wrapper_file(path, st)
 
 
 def _extract_real_provider_bin_from_wrapper(path: Path) -> Optional[str]:
@@ -406,20 +540,24 @@ def _find_real_binary(name: str, _wrapper_dir: Path) -> Optional[str]:
     """
     Resolve an executable for `name` from PATH, skipping claudex wrapper files.
     """
+    # Plain string paths: a Path object per PATH entry costs more than the stat.
+    join = os.path.join
     for raw_dir in os.environ.get("PATH", "").split(os.pathsep):
         if not raw_dir:
             continue
-        candidate = Path(raw_dir) / name
-        if not candidate.exists() or not candidate.is_file():
+        candidate = join(raw_dir, name)
+        try:
+            st = os.stat(candidate)
+        except OSError:
             continue
-        if not os.access(candidate, os.X_OK):
+        if not stat.S_ISREG(st.st_mode) or not os.access(candidate, os.X_OK):
             continue
-        if _is_claudex_wrapper(candidate):
-            extracted = _extract_real_provider_bin_from_wrapper(candidate)
+        if _is_wrapper_file(candidate, st):
+            extracted = _extract_real_provider_bin_from_wrapper(Path(candidate))
             if extracted:
                 return extracted
             continue
-        return str(candidate)
+        return candidate
     return None
 
 
@@ -454,7 +592,12 @@ def chat(
     Failover is automatic; in ask mode you'll be prompted before switching.
     Type 'exit' or Ctrl-C / Ctrl-D to quit.
     """
-    config = load_config()
+    from rich.panel import Panel
+
+    console, err_console = _get_consoles()
+    # PATH and the switch policy can't change mid-session; resolve them once.
+    config = _with_resolved_binaries(load_config(), DEFAULT_WRAPPER_DIR)
+    policy = _resolve_auto_switch(auto_switch, config)
 
     console.print(
         Panel(
@@ -467,14 +610,14 @@ def chat(
 
     while True:
         try:
-            user_input = console.input("\n[bold cyan]you>[/bold cyan] ").strip()
+            user_input = console.input(_CHAT_PROMPT).strip()
         except (EOFError, KeyboardInterrupt):
             console.print("\n[dim]Goodbye.[/dim]")
             break
 
         if not user_input:
             continue
-        if user_input.lower() in ("exit", "quit", "/exit", "/quit"):
+        if user_input.lower() in _EXIT_WORDS:
             console.print("[dim]Goodbye.[/dim]")
             break
 
@@ -483,7 +626,7 @@ def chat(
                 user_input,
                 config,
                 preferred_provider=prefer_provider,
-                auto_switch=auto_switch,
+                auto_switch=policy,
                 run_mode="chat",
             )
         except Exception as exc:  # noqa: BLE001
@@ -510,10 +653,14 @@ def ask(
 ) -> None:
     """
     Send a single prompt (one-shot mode) and print the response.
-    Exits with code 1 on error.
+    Exits with code 1 on error, 2 on an empty prompt.
     """
+    user_prompt = prompt[0].strip() if len(prompt) == 1 else " ".join(prompt).strip()
+    if not user_prompt:
+        _get_consoles()[1].print("[bold red]✗ Empty prompt.[/bold red]")
+        raise typer.Exit(2)
+
     config = load_config()
-    user_prompt = " ".join(prompt).strip()
     success, _ = _run_turn(
         user_prompt,
         config,
@@ -536,17 +683,57 @@ def status(
     """
     Print the current provider state: preference order, session IDs, cooldowns.
     """
+    from .router import get_available_providers
+
+    console = _get_consoles()[0]
     config = load_config()
     state = load_state()
-    now = datetime.now(timezone.utc)
+    now = datetime.now(_UTC)
 
-    console.print()
-
-    # ── Summary row ───────────────────────────────────────────────────────────
     available = get_available_providers(state, config, now=now)
     active_provider = state.last_provider.value if state.last_provider else "none"
     avail_names = ", ".join(p.value for p in available) or "none"
 
+    provider_order = config.get("provider_order", ["claude", "codex"])
+    rows = []
+    for p_name in provider_order:
+        try:
+            p = Provider(p_name)
+        except ValueError:
+            continue
+        ps = state.get_provider_state(p)
+        rows.append((p_name, ps, _cooldown_fields(ps, now)))
+
+    if not console.is_terminal:
+        # Piped output: plain tab-separated rows first, empty fields for
+        # missing values, then the summary as '#' comment lines.
+        print("\t".join(_STATUS_COLUMNS))
+        for p_name, ps, cooldown in rows:
+            in_cooldown = cooldown is not _NO_COOLDOWN
+            print(
+                "\t".join(
+                    (
+                        p_name,
+                        "cooldown" if in_cooldown else "ready",
+                        ps.session_id or "",
+                        ps.last_used.strftime("%Y-%m-%d %H:%M") if ps.last_used else "",
+                        *(cooldown if in_cooldown else ("", "", "")),
+                    )
+                )
+            )
+        print(f"# last_provider: {active_provider}")
+        print(f"# available: {avail_names}")
+        print(f"# total_turns: {state.turn_count}")
+        if active:
+            entry = load_active_run()
+            print(f"# active_turn: {'running' if entry else 'none'}")
+            for key in ("pid", "mode", "provider", "started_at", "prompt_excerpt"):
+                if entry:
+                    print(f"# {key}: {entry.get(key) or ''}")
+        return
+
+    # ── Summary row ───────────────────────────────────────────────────────────
+    console.print()
     console.print(f"[bold]Last provider:[/bold] {active_provider}")
     console.print(f"[bold]Available:[/bold]     {avail_names}")
     console.print(f"[bold]Total turns:[/bold]   {state.turn_count}")
@@ -557,45 +744,41 @@ def status(
     console.print()
 
     # ── Per-provider table ────────────────────────────────────────────────────
-    provider_order = config.get("provider_order", ["claude", "codex"])
-    table = Table(show_header=True, header_style="bold")
-    table.add_column("Provider")
-    table.add_column("Status")
-    table.add_column("Session ID")
-    table.add_column("Last Used")
-    table.add_column("Cooldown")
-    table.add_column("Cooldown Until")
-    table.add_column("Cooldown Source")
-
-    for p_name in provider_order:
-        try:
-            p = Provider(p_name)
-        except ValueError:
-            continue
-
-        ps = state.get_provider_state(p)
-        in_cooldown = bool(ps.cooldown_until and ps.cooldown_until > now)
-
-        status_str = "[red]✗ cooldown[/red]" if in_cooldown else "[green]✓ ready[/green]"
-        session_str = f"[dim]{ps.session_id[:20]}…[/dim]" if ps.session_id else "—"
-        last_used_str = (
-            ps.last_used.strftime("%Y-%m-%d %H:%M") if ps.last_used else "—"
-        )
-        cooldown_str = _format_cooldown(ps, now)
-        cooldown_until_str = _format_cooldown_until(ps, now)
-        cooldown_source_str = _format_cooldown_source(ps, now)
-
-        table.add_row(
+    from rich.markup import escape
+
+    # Fixed seven-column grid: pad the plain cell text, then style it. This
+    # skips rich.table's measurement and layout passes for a two-row table.
+    grid = [(_STATUS_HEADERS, ("bold",) * len(_STATUS_HEADERS))]
+    for p_name, ps, cooldown in rows:
+        in_cooldown = cooldown is not _NO_COOLDOWN
+        remaining, until, source = cooldown
+        cells = (
             p_name,
-            status_str,
-            session_str,
-            last_used_str,
-            cooldown_str,
-            cooldown_until_str,
-            cooldown_source_str,
+            "✗ cooldown" if in_cooldown else "✓ ready",
+            f"{ps.session_id[:20]}…" if ps.session_id else "—",
+            ps.last_used.strftime("%Y-%m-%d %H:%M") if ps.last_used else "—",
+            remaining,
+            until,
+            source,
         )
-
-    console.print(table)
+        styles = (
+            "",
+            "red" if in_cooldown else "green",
+            "dim" if ps.session_id else "",
+            "",
+            "yellow" if in_cooldown else "",
+            "",
+            "",
+        )
+        grid.append((cells, styles))
+
+    widths = [max(len(cells[i]) for cells, _ in grid) for i in range(len(_STATUS_HEADERS))]
+    for cells, styles in grid:
+        parts = []
+        for cell, style, width in zip(cells, styles, widths):
+            padded = escape(cell.ljust(width))
+            parts.append(f"[{style}]{padded}[/{style}]" if style else padded)
+        console.print("  ".join(parts).rstrip(), highlight=False, soft_wrap=True)
     console.print()
 
 
@@ -619,6 +802,7 @@ def install_wrappers(
     - `claudecode` -> claudex launch with claude preferred first
     - `codex`      -> claudex launch with codex preferred first
     """
+    console, err_console = _get_consoles()
     real_codex = _find_real_binary("codex", directory)
     if not real_codex:
         err_console.print(
@@ -707,13 +891,15 @@ def launch(
     This command does provider routing only, then execs the real `claude` or
     `codex` binary so native progress output and interaction stay unchanged.
     """
+    from .router import get_available_providers
+
     config = load_config()
     launch_config = _with_preferred_provider(config, prefer_provider)
     state = load_state()
     available = get_available_providers(state, launch_config)
 
     if not available:
-        err_console.print(
+        _get_consoles()[1].print(
             "\n[bold red]✗ All providers are in cooldown.[/bold red] "
             "Run [bold]claudex status[/bold] to see timers.\n"
         )
@@ -729,13 +915,13 @@ def launch(
             break
 
     if selected is None or binary is None:
-        err_console.print(
+        _get_consoles()[1].print(
             "[bold red]Could not locate a real claude/claudecode/codex binary in PATH.[/bold red]"
         )
         raise typer.Exit(1)
 
     if prefer_provider is not None and selected != prefer_provider:
-        err_console.print(
+        _get_consoles()[1].print(
             f"claudex: switched {prefer_provider.value} -> {selected.value}"
         )
 
@@ -746,7 +932,8 @@ def launch(
     # may still be reachable first in PATH.
     env["CLAUDEX_INNER_PROVIDER_CALL"] = "1"
 
-    os.execvpe(binary, argv, env)
+    # `binary` is already a resolved path, so skip execvpe's PATH walk.
+    os.execve(binary, argv, env)
 
 
 @app.command("uninstall-wrappers")
@@ -760,12 +947,15 @@ def uninstall_wrappers(
     """
     Remove wrapper scripts previously created by `claudex install-wrappers`.
     """
+    console = _get_consoles()[0]
     removed = 0
     for name in ("claude", "codex", "claudecode"):
         path = directory / name
-        if not path.exists():
+        try:
+            st = os.stat(path)
+        except OSError:
             continue
-        if not _is_claudex_wrapper(path):
+        if not _is_wrapper_file(path, st):
             console.print(f"[yellow]Skipping non-claudex file:[/yellow] {path}")
             continue
         path.unlink()
@@ -784,6 +974,7 @@ def reset(
     Delete all .claudex/ state for the current repository.
     This clears sessions, handoff context, and the transcript log.
     """
+    console = _get_consoles()[0]
     if not CLAUDEX_DIR.exists():
         console.print("[dim]Nothing to reset — .claudex/ does not exist.[/dim]")
         return
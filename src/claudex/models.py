@@ -1,13 +1,12 @@
-"""Pydantic models for claudex state."""
+"""Data models for claudex state."""
 
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
 from typing import Optional
 
-from pydantic import BaseModel, Field
-
 
 class Provider(str, Enum):
     """The two supported AI CLI providers."""
@@ -30,7 +29,36 @@ class ErrorClass(str, Enum):
     OTHER_ERROR = "OTHER_ERROR"
 
 
-class ProviderState(BaseModel):
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _parse_datetime(value: object) -> Optional[datetime]:
+    """Parse an ISO-8601 timestamp from state.json; naive values are taken as UTC."""
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise TypeError(f"expected ISO-8601 string, got {type(value).__name__}")
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _parse_optional_str(value: object) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    raise TypeError(f"expected string, got {type(value).__name__}")
+
+
+def _parse_int(value: object) -> int:
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(f"expected integer, got {type(value).__name__}")
+    return value
+
+
+@dataclass(slots=True)
+class ProviderState:
     """Per-provider runtime state tracked across turns."""
     # The session/thread ID from the last successful turn (used for resumption)
     session_id: Optional[str] = None
@@ -48,28 +76,72 @@ class ProviderState(BaseModel):
     # Running count of consecutive errors (reset on success)
     consecutive_errors: int = 0
 
+    @classmethod
+    def from_dict(cls, data: dict) -> ProviderState:
+        """Build from decoded JSON; missing keys take defaults, bad types raise."""
+        if not isinstance(data, dict):
+            raise TypeError("provider state must be an object")
+        return cls(
+            session_id=_parse_optional_str(data.get("session_id")),
+            last_used=_parse_datetime(data.get("last_used")),
+            cooldown_until=_parse_datetime(data.get("cooldown_until")),
+            cooldown_started_at=_parse_datetime(data.get("cooldown_started_at")),
+            cooldown_source=_parse_optional_str(data.get("cooldown_source")),
+            cooldown_reason=_parse_optional_str(data.get("cooldown_reason")),
+            cooldown_message_excerpt=_parse_optional_str(
+                data.get("cooldown_message_excerpt")
+            ),
+            consecutive_errors=_parse_int(data.get("consecutive_errors", 0)),
+        )
+
 
-class ClaudexState(BaseModel):
+@dataclass(slots=True)
+class ClaudexState:
     """
     Root state object serialized to .claudex/state.json.
     One file per repo (lives next to .git/).
     """
     last_provider: Optional[Provider] = None
-    claude: ProviderState = Field(default_factory=ProviderState)
-    codex: ProviderState = Field(default_factory=ProviderState)
+    claude: ProviderState = field(default_factory=ProviderState)
+    codex: ProviderState = field(default_factory=ProviderState)
     turn_count: int = 0
-    created_at: datetime = Field(
-        default_factory=lambda: datetime.now(timezone.utc)
-    )
-    updated_at: datetime = Field(
-        default_factory=lambda: datetime.now(timezone.utc)
-    )
+    created_at: datetime = field(default_factory=_utcnow)
+    updated_at: datetime = field(default_factory=_utcnow)
 
+    @classmethod
+    def from_dict(cls, data: dict) -> ClaudexState:
+        """Build from decoded JSON; missing keys take defaults, bad types raise."""
+        if not isinstance(data, dict):
+            raise TypeError("state must be an object")
+        last_provider = data.get("last_provider")
+        state = cls(
+            last_provider=Provider(last_provider) if last_provider is not None else None,
+            claude=ProviderState.from_dict(data.get("claude", {})),
+            codex=ProviderState.from_dict(data.get("codex", {})),
+            turn_count=_parse_int(data.get("turn_count", 0)),
+        )
+        created_at = _parse_datetime(data.get("created_at"))
+        if created_at is not None:
+            state.created_at = created_at
+        updated_at = _parse_datetime(data.get("updated_at"))
+        if updated_at is not None:
+            state.updated_at = updated_at
+        return state
+
+    # Each provider's state lives in the field named after its enum value,
+    # which keeps state.json's {"claude": ..., "codex": ...} layout intact.
     def get_provider_state(self, provider: Provider) -> ProviderState:
-        return self.claude if provider == Provider.CLAUDE else self.codex
+        return getattr(self, provider.value)
 
     def set_provider_state(self, provider: Provider, ps: ProviderState) -> None:
-        if provider == Provider.CLAUDE:
-            self.claude = ps
-        else:
-            self.codex = ps
+        setattr(self, provider.value, ps)
+
+
+@dataclass(slots=True)
+class ActiveRun:
+    """In-flight turn metadata written to .claudex/active.json."""
+    pid: int
+    mode: str
+    started_at: str
+    prompt_excerpt: str
+    provider: Optional[str] = None
@@ -2,18 +2,43 @@
 
 from __future__ import annotations
 
+import os
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
 
 from ..models import ErrorClass
 
+# Only the tail of a provider's raw output is kept on a ProviderResult; error
+# text shows up at the end, and a long agent transcript shouldn't stay alive
+# for the rest of a chat session.
+RAW_OUTPUT_LIMIT = 8192
 
-@dataclass
+
+@lru_cache(maxsize=1)
+def inner_call_env() -> Mapping[str, str]:
+    """
+    Environment for provider subprocesses: ours plus
+    CLAUDEX_INNER_PROVIDER_CALL=1, so an installed `claude`/`codex` wrapper
+    that routes through claudex passes the call straight to the real CLI
+    instead of recursing.
+
+    Snapshotted from os.environ on first use and returned read-only; changes
+    to os.environ later in the process are not seen by provider calls.
+    """
+    env = os.environ.copy()
+    env["CLAUDEX_INNER_PROVIDER_CALL"] = "1"
+    return MappingProxyType(env)
+
+
+@dataclass(slots=True, frozen=True)
 class ProviderResult:
     """
     Unified result from any provider CLI invocation.
     Callers inspect `success` first, then either `text` or `error_class`.
+    Immutable: build a new result rather than updating one in place.
     """
     success: bool
 
@@ -29,9 +54,14 @@ class ProviderResult:
     # Human-readable error message for display (only set when success=False)
     error_message: Optional[str] = None
 
-    # Raw stdout+stderr concatenated — kept for debugging, never shown by default
+    # Last RAW_OUTPUT_LIMIT chars of stdout+stderr — kept for debugging,
+    # never shown by default
     raw_output: Optional[str] = field(default=None, repr=False)
 
+    def __post_init__(self) -> None:
+        if self.raw_output is not None and len(self.raw_output) > RAW_OUTPUT_LIMIT:
+            object.__setattr__(self, "raw_output", self.raw_output[-RAW_OUTPUT_LIMIT:])
+
 
 class BaseProvider(ABC):
     """Common interface that all provider implementations must satisfy."""
@@ -43,7 +73,7 @@ class BaseProvider(ABC):
         self,
         prompt: str,
         session_id: Optional[str],
-        config: dict,
+        config: Mapping[str, Any],
     ) -> ProviderResult:
         """
         Execute a single prompt turn against the provider CLI.
@@ -55,7 +85,7 @@ class BaseProvider(ABC):
         session_id:
             If set, attempt to resume this session (provider-specific semantics).
         config:
-            Merged config dict from load_config().
+            Merged, read-only config from load_config().
 
         Returns
         -------
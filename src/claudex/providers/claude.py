@@ -21,11 +21,11 @@ We scan for the item with "type": "result" which has:
 from __future__ import annotations
 
 import json
-import os
+import re
 import subprocess
-from typing import Optional
+from typing import Any, Mapping, Optional
 
-from .base import BaseProvider, ProviderResult
+from .base import BaseProvider, ProviderResult, inner_call_env
 from ..models import ErrorClass
 
 # ── Error pattern matching ────────────────────────────────────────────────────
@@ -58,6 +58,16 @@ _RATE_LIMIT_PATTERNS = [
 ]
 
 
+def _compile_patterns(patterns: list[str] | tuple[str, ...]) -> re.Pattern[str]:
+    """Fold a list of literal phrases into one case-insensitive alternation."""
+    return re.compile("|".join(map(re.escape, patterns)), re.IGNORECASE)
+
+
+_QUOTA_RE = _compile_patterns(_QUOTA_PATTERNS)
+_AUTH_RE = _compile_patterns(_AUTH_PATTERNS)
+_RATE_LIMIT_RE = _compile_patterns(_RATE_LIMIT_PATTERNS)
+
+
 class ClaudeProvider(BaseProvider):
     name = "claude"
 
@@ -65,12 +75,13 @@ class ClaudeProvider(BaseProvider):
         self,
         prompt: str,
         session_id: Optional[str],
-        config: dict,
+        config: Mapping[str, Any],
     ) -> ProviderResult:
         """
         Build and execute the `claude` command, then parse the JSON result.
         """
-        cmd = ["claude"]
+        # `binary` is filled in by `claudex chat`, which resolves it once per session
+        cmd = [config.get("claude", {}).get("binary") or "claude"]
 
         # Resume an existing conversation if we have a session ID
         if session_id:
@@ -84,10 +95,7 @@ class ClaudeProvider(BaseProvider):
             cmd.extend(["--allowedTools", tool])
 
         try:
-            env = os.environ.copy()
-            # If user installs a `claude` wrapper that routes through claudex,
-            # mark provider-internal calls so wrappers can bypass recursion.
-            env["CLAUDEX_INNER_PROVIDER_CALL"] = "1"
+            env = inner_call_env()
             proc = self._run_subprocess(cmd, env)
         except subprocess.TimeoutExpired:
             return ProviderResult(
@@ -118,7 +126,7 @@ class ClaudeProvider(BaseProvider):
         raw = (proc.stdout or "") + (proc.stderr or "")
         return self._parse(proc, raw)
 
-    def _run_subprocess(self, cmd: list[str], env: dict[str, str]) -> subprocess.CompletedProcess:
+    def _run_subprocess(self, cmd: list[str], env: Mapping[str, str]) -> subprocess.CompletedProcess:
         return subprocess.run(
             cmd,
             capture_output=True,
@@ -208,15 +216,13 @@ class ClaudeProvider(BaseProvider):
         )
 
     def _classify(self, text: str, exit_code: int) -> ErrorClass:
-        lower = text.lower()
-
-        if any(p in lower for p in _QUOTA_PATTERNS):
+        if _QUOTA_RE.search(text):
             return ErrorClass.QUOTA_EXHAUSTED
 
-        if any(p in lower for p in _AUTH_PATTERNS):
+        if _AUTH_RE.search(text):
             return ErrorClass.AUTH_REQUIRED
 
-        if any(p in lower for p in _RATE_LIMIT_PATTERNS):
+        if _RATE_LIMIT_RE.search(text):
             return ErrorClass.TRANSIENT_RATE_LIMIT
 
         return ErrorClass.OTHER_ERROR
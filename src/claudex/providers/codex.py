@@ -20,12 +20,20 @@ Example JSONL stream (abbreviated):
 
 from __future__ import annotations
 
-import json
+import io
 import os
+import re
+import signal
 import subprocess
-from typing import Optional
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping, Optional
 
-from .base import BaseProvider, ProviderResult
+import orjson
+
+from .base import BaseProvider, ProviderResult, inner_call_env
 from ..models import ErrorClass
 
 _QUOTA_PATTERNS = (
@@ -37,6 +45,49 @@ _QUOTA_PATTERNS = (
     "billing period",
 )
 
+_QUOTA_RE = re.compile("|".join(map(re.escape, _QUOTA_PATTERNS)), re.IGNORECASE)
+_RATE_LIMIT_RE = re.compile(r"rate limit|too many requests|429", re.IGNORECASE)
+_AUTH_RE = re.compile(r"unauthorized|authentication|401", re.IGNORECASE)
+# Structured error events carry the HTTP status separately, so the message
+# text is only checked for the phrases (not bare status digits).
+_EVENT_RATE_LIMIT_RE = re.compile(r"rate limit", re.IGNORECASE)
+_EVENT_AUTH_RE = re.compile(r"unauthorized|authentication", re.IGNORECASE)
+
+# Every event that can carry assistant text has one of these JSON strings as a
+# type value, so lines without any of them are skipped without decoding.
+_ASSISTANT_MARKERS = (
+    '"agent_message"',
+    '"assistant_message"',
+    '"message"',
+    '"response"',
+)
+
+_TIMEOUT_SECONDS = 300  # 5-minute hard limit per turn
+
+# stdout lines kept while streaming, for raw_output and the raw-text fallback
+_RAW_TAIL_LINES = 128
+
+# Newest possibly-assistant lines held back undecoded until the stream ends
+_CANDIDATE_LINES = 8
+
+
+def _kill_process_group(proc: subprocess.Popen) -> None:
+    """SIGKILL codex and anything it spawned into its session, then reap it."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+        # Group already gone; make sure the direct child is dead regardless
+        proc.kill()
+    proc.wait()
+
+
+@dataclass(slots=True)
+class _StreamState:
+    """What survives of the JSONL stream while it is being read."""
+    thread_id: Optional[str] = None
+    assistant_text: Optional[str] = None
+    last_error: Optional[dict] = None
+
 
 class CodexProvider(BaseProvider):
     name = "codex"
@@ -45,13 +96,13 @@ class CodexProvider(BaseProvider):
         self,
         prompt: str,
         session_id: Optional[str],
-        config: dict,
+        config: Mapping[str, Any],
     ) -> ProviderResult:
         """
         Build and execute the `codex exec` command, then parse the JSONL output.
         """
         codex_cfg = config.get("codex", {})
-        cmd = ["codex", "exec"]
+        cmd = [codex_cfg.get("binary") or "codex", "exec"]
 
         model = codex_cfg.get("model")
         if model:
@@ -81,17 +132,7 @@ class CodexProvider(BaseProvider):
         cmd.append(prompt)
 
         try:
-            env = os.environ.copy()
-            # If user installed a `codex` wrapper that routes through claudex,
-            # mark provider-internal calls so wrappers can bypass recursion.
-            env["CLAUDEX_INNER_PROVIDER_CALL"] = "1"
-            proc = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300,
-                env=env,
-            )
+            return self._run_streaming(cmd, inner_call_env())
         except subprocess.TimeoutExpired:
             return ProviderResult(
                 success=False,
@@ -108,72 +149,166 @@ class CodexProvider(BaseProvider):
                 ),
             )
 
-        return self._parse_jsonl(proc)
+    def _run_streaming(self, cmd: list[str], env: Mapping[str, str]) -> ProviderResult:
+        """
+        Run codex and parse its JSONL events as they are emitted, so parsing
+        overlaps generation. stdout is parsed and stderr drained on helper
+        threads, which keeps either pipe from filling up.
+
+        codex runs in its own session so a timeout can kill the whole process
+        group. The deadline also covers reading the pipes: a helper that
+        inherited them and outlives codex can't hold the turn open past it.
+        """
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            env=env,
+            start_new_session=True,
+        )
+        stdout_tail: deque[str] = deque(maxlen=_RAW_TAIL_LINES)
+        parsed: list = []
+        stderr_parts: list[str] = []
+
+        def _read_stdout() -> None:
+            try:
+                parsed.append(self._consume_events(proc.stdout, stdout_tail))
+            except BaseException as exc:
+                parsed.append(exc)
+
+        reader = threading.Thread(target=_read_stdout, daemon=True)
+        drain = threading.Thread(
+            target=lambda: stderr_parts.append(proc.stderr.read()), daemon=True
+        )
+        deadline = time.monotonic() + _TIMEOUT_SECONDS
+        reader.start()
+        drain.start()
+        try:
+            returncode = proc.wait(timeout=_TIMEOUT_SECONDS)
+            for thread in (reader, drain):
+                thread.join(max(deadline - time.monotonic(), 0))
+                if thread.is_alive():
+                    raise subprocess.TimeoutExpired(cmd, _TIMEOUT_SECONDS)
+        except BaseException:
+            # The reader threads may still be blocked on the pipes, so they
+            # are left to finish on EOF rather than having the pipes closed.
+            _kill_process_group(proc)
+            raise
+
+        proc.stdout.close()
+        proc.stderr.close()
+        if isinstance(parsed[0], BaseException):
+            raise parsed[0]
+        raw = "".join(stdout_tail) + "".join(stderr_parts)
+        return self._build_result(parsed[0], returncode, raw)
 
     # ── JSONL parsing ─────────────────────────────────────────────────────────
 
     def _parse_jsonl(self, proc: subprocess.CompletedProcess) -> ProviderResult:
+        """Parse the captured output of a finished codex run."""
+        stdout = proc.stdout or ""
+        state = self._consume_events(io.StringIO(stdout))
+        return self._build_result(state, proc.returncode, stdout + (proc.stderr or ""))
+
+    def _consume_events(
+        self, lines: Iterable[str], keep: Optional[deque[str]] = None
+    ) -> _StreamState:
         """
         Walk the JSONL event stream and extract:
           - thread_id from thread.started
           - assistant text from the last item.completed with type==agent_message
           - error info from error events
         Non-JSON lines are silently skipped (codex may emit progress lines).
+        Each raw line is appended to `keep` when given.
+
+        Only the last assistant message is kept, so the newest lines that might
+        carry one are set aside unparsed and decoded newest-first once the
+        stream ends. A line pushed out of that window is decoded on the way
+        out and its text, if any, kept as the fallback answer. Lines that
+        match none of the substring prefilters are never decoded.
         """
-        stdout = proc.stdout or ""
-        stderr = proc.stderr or ""
-        raw = stdout + stderr
+        state = _StreamState()
+        candidates: deque[str] = deque()
+        for line in lines:
+            if keep is not None:
+                keep.append(line)
+            if any(marker in line for marker in _ASSISTANT_MARKERS):
+                if len(candidates) == _CANDIDATE_LINES:
+                    text = self._line_assistant_text(candidates.popleft())
+                    if text:
+                        state.assistant_text = text
+                candidates.append(line)
+            if '"thread.started"' in line or '"error"' in line:
+                event = self._decode_event(line)
+                if event is not None:
+                    self._apply_event(state, event)
+
+        for line in reversed(candidates):
+            text = self._line_assistant_text(line)
+            if text:
+                state.assistant_text = text
+                break
+        return state
 
-        thread_id: Optional[str] = None
-        assistant_text: Optional[str] = None
-        last_error: Optional[dict] = None
+    def _line_assistant_text(self, line: str) -> Optional[str]:
+        event = self._decode_event(line)
+        return self._event_assistant_text(event) if event is not None else None
 
-        for line in stdout.splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                event = json.loads(line)
-            except json.JSONDecodeError:
-                continue  # Not a JSON event line — skip
-
-            event_type = event.get("type", "")
-
-            if event_type == "thread.started":
-                # Capture whichever id field codex uses (field name varies by version)
-                thread_id = (
-                    event.get("thread_id")
-                    or event.get("id")
-                    or event.get("session_id")
+    def _decode_event(self, line: str) -> Optional[dict]:
+        try:
+            event = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            return None  # Not a JSON event line — skip
+        return event if isinstance(event, dict) else None
+
+    def _apply_event(self, state: _StreamState, event: dict) -> None:
+        event_type = event.get("type", "")
+
+        if event_type == "thread.started":
+            # Capture whichever id field codex uses (field name varies by version)
+            state.thread_id = (
+                event.get("thread_id")
+                or event.get("id")
+                or event.get("session_id")
+            )
+
+        elif event_type == "error":
+            state.last_error = event
+
+    def _event_assistant_text(self, event: dict) -> Optional[str]:
+        # Newer codex versions can emit assistant responses in additional
+        # event envelopes (for example "message" / "response" objects).
+        extracted = self._extract_assistant_text(event)
+        if extracted:
+            return extracted
+
+        if event.get("type") != "item.completed":
+            return None
+        item = event.get("item", {})
+        if item.get("type") != "agent_message":
+            return None
+        # content is a list of blocks; concatenate all text blocks
+        parts: list[str] = []
+        for block in item.get("content", []):
+            if isinstance(block, dict):
+                # Different field names across codex versions
+                text = (
+                    block.get("text")
+                    or block.get("output_text")
+                    or ""
                 )
+                if text:
+                    parts.append(text)
+        return "\n".join(parts) or None
 
-            elif event_type == "item.completed":
-                item = event.get("item", {})
-                if item.get("type") == "agent_message":
-                    # content is a list of blocks; concatenate all text blocks
-                    parts: list[str] = []
-                    for block in item.get("content", []):
-                        if isinstance(block, dict):
-                            # Different field names across codex versions
-                            text = (
-                                block.get("text")
-                                or block.get("output_text")
-                                or ""
-                            )
-                            if text:
-                                parts.append(text)
-                    if parts:
-                        # Keep the LAST agent_message (final answer)
-                        assistant_text = "\n".join(parts)
-
-            elif event_type == "error":
-                last_error = event
-
-            # Newer codex versions can emit assistant responses in additional
-            # event envelopes (for example "message" / "response" objects).
-            extracted = self._extract_assistant_text(event)
-            if extracted:
-                assistant_text = extracted
+    def _build_result(
+        self, state: _StreamState, returncode: int, raw: str
+    ) -> ProviderResult:
+        thread_id = state.thread_id
+        assistant_text = state.assistant_text
+        last_error = state.last_error
 
         # ── Determine result ──────────────────────────────────────────────────
 
@@ -188,9 +323,9 @@ class CodexProvider(BaseProvider):
                 raw_output=raw,
             )
 
-        if proc.returncode != 0 and not assistant_text:
+        if returncode != 0 and not assistant_text:
             # Non-zero exit but no error event parsed — classify from raw text
-            error_class = self._classify_text(raw, proc.returncode)
+            error_class = self._classify_text(raw, returncode)
             return ProviderResult(
                 success=False,
                 session_id=thread_id,
@@ -219,19 +354,17 @@ class CodexProvider(BaseProvider):
     # ── Error classification ──────────────────────────────────────────────────
 
     def _classify_error_event(self, event: dict) -> ErrorClass:
-        message = self._event_message_text(event).lower()
+        message = self._event_message_text(event)
         status = self._parse_status_code(event.get("status"))
 
         # 429 can be either quota-exhausted or transient rate limit —
         # distinguish by checking the message content
-        if status == 429 or "rate limit" in message or any(
-            p in message for p in _QUOTA_PATTERNS
-        ):
-            if any(p in message for p in _QUOTA_PATTERNS):
-                return ErrorClass.QUOTA_EXHAUSTED
+        if _QUOTA_RE.search(message):
+            return ErrorClass.QUOTA_EXHAUSTED
+        if status == 429 or _EVENT_RATE_LIMIT_RE.search(message):
             return ErrorClass.TRANSIENT_RATE_LIMIT
 
-        if status == 401 or "unauthorized" in message or "authentication" in message:
+        if status == 401 or _EVENT_AUTH_RE.search(message):
             return ErrorClass.AUTH_REQUIRED
 
         return ErrorClass.OTHER_ERROR
@@ -252,15 +385,13 @@ class CodexProvider(BaseProvider):
 
     def _classify_text(self, text: str, exit_code: int) -> ErrorClass:
         """Fallback classifier when there is no structured error event."""
-        lower = text.lower()
-
-        if any(p in lower for p in _QUOTA_PATTERNS):
+        if _QUOTA_RE.search(text):
             return ErrorClass.QUOTA_EXHAUSTED
 
-        if "rate limit" in lower or "429" in text or "too many requests" in lower:
+        if _RATE_LIMIT_RE.search(text):
             return ErrorClass.TRANSIENT_RATE_LIMIT
 
-        if "unauthorized" in lower or "authentication" in lower or "401" in text:
+        if _AUTH_RE.search(text):
             return ErrorClass.AUTH_REQUIRED
 
         return ErrorClass.OTHER_ERROR
@@ -2,8 +2,8 @@
 Core routing logic: provider selection, retry, backoff, and failover.
 
 The routing algorithm:
-  1. Build the ordered list of available providers (skip those in cooldown).
-  2. For each provider in order:
+  1. Walk providers in configured order, skipping those in cooldown.
+  2. For each available provider:
      a. If this is NOT the first provider we're trying (i.e. we're falling
         back), rebuild the prompt with handoff context prepended so the new
         provider has full continuity.
@@ -21,26 +21,29 @@ All state mutations are returned (not written to disk) — callers save to disk.
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain
+import random
 import re
 import time
 from datetime import datetime, timedelta, timezone
-from typing import Callable, Optional, Tuple
+from typing import Any, Callable, Iterator, Mapping, Optional, Tuple
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from .config import RetryConfig
 from .handoff import build_provider_prompt
 from .models import ClaudexState, ErrorClass, Provider, ProviderState
 from .providers.base import BaseProvider, ProviderResult
-from .providers.claude import ClaudeProvider
-from .providers.codex import CodexProvider
 
 # ── Provider registry ─────────────────────────────────────────────────────────
 
-# Module-level singletons — both providers are stateless objects.
+# Module-level singletons — both providers are stateless objects, created on
+# first use by _get_provider() so their modules aren't imported at startup.
 # Tests can patch this dict to inject mocks.
-PROVIDERS: dict[Provider, BaseProvider] = {
-    Provider.CLAUDE: ClaudeProvider(),
-    Provider.CODEX: CodexProvider(),
-}
+PROVIDERS: dict[Provider, BaseProvider] = {}
+
+# Config names → Provider, so unknown names are a dict miss rather than a ValueError
+_PROVIDER_BY_STR: dict[str, Provider] = {p.value: p for p in Provider}
 
 # Defensive fallback patterns for quota/plan exhaustion text.
 # Used only when a provider returns OTHER_ERROR with a clearly limit-like message.
@@ -53,18 +56,34 @@ _LIMIT_TEXT_PATTERNS = (
     "resets ",
     "claude.ai/settings/limits",
 )
+_LIMIT_TEXT_RE = re.compile(
+    "|".join(map(re.escape, _LIMIT_TEXT_PATTERNS)), re.IGNORECASE
+)
 
-_RESET_TIME_12H_PATTERN = re.compile(
-    r"resets?\s+(?:at\s+)?(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*"
-    r"(?P<ampm>am|pm)\s*[.,:;\-·]?\s*\((?P<tz>[^)]+)\)",
+# "resets 6pm (America/Los_Angeles)" or "resets at 18:00 (UTC)", in one pass
+_RESET_TIME_PATTERN = re.compile(
+    r"resets?\s+(?:at\s+)?"
+    r"(?:(?P<h12>\d{1,2})(?::(?P<m12>\d{2}))?\s*(?P<ampm>am|pm)"
+    r"|(?P<h24>[01]?\d|2[0-3]):(?P<m24>[0-5]\d))"
+    r"\s*[.,:;\-·]?\s*\((?P<tz>[^)]+)\)",
     re.IGNORECASE,
 )
-_RESET_TIME_24H_PATTERN = re.compile(
-    r"resets?\s+(?:at\s+)?(?P<hour>(?:[01]?\d|2[0-3])):(?P<minute>[0-5]\d)"
-    r"\s*[.,:;\-·]?\s*\((?P<tz>[^)]+)\)",
+
+_WORD_RE = re.compile(r"\S+")
+
+# Server-supplied retry hints, e.g. "Retry-After: 12", "try again in 5 seconds"
+# The number must be followed by a known unit or by no word at all, so
+# "in 5 weeks" is ignored rather than read as 5 seconds.
+_RETRY_AFTER_PATTERN = re.compile(
+    r"(?:retry[- ]after|try again in|retry in)\s*:?\s*(?P<value>\d+(?:\.\d+)?)"
+    r"(?:\s*(?P<unit>ms|milliseconds?|s|secs?|seconds?|m|mins?|minutes?"
+    r"|h|hrs?|hours?|d|days?)\b|(?!\s*[a-z\d]|\.\d))",
     re.IGNORECASE,
 )
 
+# Seconds per unit, keyed by the unit's first letter ("ms"/"milli…" handled apart)
+_RETRY_AFTER_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
 
 @dataclass(frozen=True)
 class _CooldownDecision:
@@ -74,12 +93,26 @@ class _CooldownDecision:
     message_excerpt: Optional[str] = None
 
 
+def _get_provider(provider: Provider) -> BaseProvider:
+    """Return the provider implementation, importing its module on first use."""
+    provider_obj = PROVIDERS.get(provider)
+    if provider_obj is None:
+        if provider == Provider.CLAUDE:
+            from .providers.claude import ClaudeProvider
+            provider_obj = ClaudeProvider()
+        else:
+            from .providers.codex import CodexProvider
+            provider_obj = CodexProvider()
+        PROVIDERS[provider] = provider_obj
+    return provider_obj
+
+
 # ── Provider availability ─────────────────────────────────────────────────────
 
 
 def get_available_providers(
     state: ClaudexState,
-    config: dict,
+    config: Mapping[str, Any],
     now: Optional[datetime] = None,
 ) -> list[Provider]:
     """
@@ -90,29 +123,29 @@ def get_available_providers(
     state:
         Current ClaudexState (read-only here).
     config:
-        Merged config dict.
+        Merged, read-only config (from load_config()).
     now:
         Override current time (useful for tests).
     """
     if now is None:
         now = datetime.now(timezone.utc)
+    return list(_iter_available_providers(state, config, now))
 
-    order = config.get("provider_order", ["claude", "codex"])
-    available: list[Provider] = []
 
-    for name in order:
-        try:
-            p = Provider(name)
-        except ValueError:
+def _iter_available_providers(
+    state: ClaudexState, config: Mapping[str, Any], now: datetime
+) -> Iterator[Provider]:
+    """Lazily yield what get_available_providers() would return."""
+    for name in config.get("provider_order", ["claude", "codex"]):
+        p = _PROVIDER_BY_STR.get(name)
+        if p is None:
             continue  # Unknown name in config — ignore
 
         ps = state.get_provider_state(p)
         if ps.cooldown_until and ps.cooldown_until > now:
             continue  # Still cooling down
 
-        available.append(p)
-
-    return available
+        yield p
 
 
 # ── Main routing entry point ──────────────────────────────────────────────────
@@ -121,7 +154,7 @@ def get_available_providers(
 def run_with_retry(
     user_prompt: str,
     state: ClaudexState,
-    config: dict,
+    config: Mapping[str, Any],
     handoff_content: Optional[str] = None,
     confirm_switch: Optional[
         Callable[[Provider, Provider, ProviderResult], bool]
@@ -139,7 +172,7 @@ def run_with_retry(
     state:
         Current ClaudexState; returned mutated on success/failure.
     config:
-        Merged config dict (from load_config()).
+        Merged, read-only config (from load_config()).
     handoff_content:
         Contents of handoff.md if it exists, used when falling back to
         a provider that needs context injected.
@@ -150,24 +183,32 @@ def run_with_retry(
       - result is None only if ALL providers are in cooldown.
       - provider_used is None only if result is None.
     """
-    retry_cfg = config.get("retry", {})
-    max_retries: int = retry_cfg.get("max_retries", 3)
-    backoff_base: float = retry_cfg.get("backoff_base", 2.0)
-    backoff_max: float = retry_cfg.get("backoff_max", 30.0)
-    cooldown_minutes: int = retry_cfg.get("cooldown_minutes", 60)
-    transient_cooldown_minutes: int = retry_cfg.get(
-        "transient_cooldown_minutes", 5
+    retry_cfg = RetryConfig.from_dict(config)
+    backoff_schedule = _backoff_schedule(
+        retry_cfg.backoff_base, retry_cfg.backoff_max, retry_cfg.max_retries
     )
-
-    available = get_available_providers(state, config)
-    if not available:
+    quota_cooldown = timedelta(minutes=retry_cfg.cooldown_minutes)
+    if retry_cfg.jitter:
+        # Spread the fallback quota cooldown by ±10% so shells sharing one
+        # account don't all come back at once. A parsed reset time wins anyway.
+        quota_cooldown *= random.uniform(0.9, 1.1)
+    transient_cooldown = timedelta(minutes=retry_cfg.transient_cooldown_minutes)
+
+    # Fallbacks are only checked if the turn actually fails over; the common
+    # case stops at the first provider out of cooldown.
+    available = _iter_available_providers(state, config, datetime.now(timezone.utc))
+    first = next(available, None)
+    if first is None:
         return None, None, state
 
     result: Optional[ProviderResult] = None
     last_provider: Optional[Provider] = None
     pending_fallback: Optional[tuple[Provider, ProviderResult]] = None
+    # The handoff prompt doesn't depend on which fallback receives it, so the
+    # git snapshot behind it is built at most once per call.
+    fallback_prompt: Optional[str] = None
 
-    for idx, provider in enumerate(available):
+    for idx, provider in enumerate(chain((first,), available)):
         # If we are moving to a fallback provider due to a previous provider
         # failure, allow the caller to gate that switch.
         if idx > 0 and pending_fallback and confirm_switch:
@@ -177,8 +218,9 @@ def run_with_retry(
                 return failed_result, from_provider, state
 
         last_provider = provider
+        # The live object inside `state`: updates below need no write-back
         ps: ProviderState = state.get_provider_state(provider)
-        provider_obj: BaseProvider = PROVIDERS[provider]
+        provider_obj = _get_provider(provider)
 
         # ── Build the prompt for this provider ────────────────────────────────
         # If we are NOT on the first (preferred) provider, it means the previous
@@ -186,12 +228,14 @@ def run_with_retry(
         # the new provider has full continuity without an active session.
         is_fallback = idx > 0
         if is_fallback:
-            prompt = build_provider_prompt(
-                user_prompt=user_prompt,
-                config=config,
-                is_resuming=True,
-                handoff_content=handoff_content,
-            )
+            if fallback_prompt is None:
+                fallback_prompt = build_provider_prompt(
+                    user_prompt=user_prompt,
+                    config=config,
+                    is_resuming=True,
+                    handoff_content=handoff_content,
+                )
+            prompt = fallback_prompt
         else:
             # First provider: use its session_id for resumption if available.
             # The session already contains the conversation history.
@@ -200,7 +244,7 @@ def run_with_retry(
         provider_session_id = None if is_fallback else ps.session_id
 
         # ── Retry loop for this provider ──────────────────────────────────────
-        for attempt in range(max_retries + 1):
+        for attempt in range(retry_cfg.max_retries + 1):
             if on_provider_start:
                 on_provider_start(provider)
             result = provider_obj.run(
@@ -208,14 +252,15 @@ def run_with_retry(
                 session_id=provider_session_id,
                 config=config,
             )
+            # One timestamp per attempt, shared by last_used and cooldown math.
+            now_utc = datetime.now(timezone.utc)
 
             if result.success:
                 # ✓ Update session ID and clear error bookkeeping
                 ps.session_id = result.session_id or ps.session_id
-                ps.last_used = datetime.now(timezone.utc)
+                ps.last_used = now_utc
                 ps.consecutive_errors = 0
                 _clear_cooldown(ps)
-                state.set_provider_state(provider, ps)
                 state.last_provider = provider
                 state.turn_count += 1
                 return result, provider, state
@@ -223,7 +268,6 @@ def run_with_retry(
             # ── Handle failure ────────────────────────────────────────────────
 
             ps.consecutive_errors += 1
-            state.set_provider_state(provider, ps)
 
             effective_error = result.error_class
             if (
@@ -236,34 +280,36 @@ def run_with_retry(
 
             if effective_error == ErrorClass.QUOTA_EXHAUSTED:
                 # Hard quota hit — long cooldown, immediately try next provider
-                now_utc = datetime.now(timezone.utc)
                 decision = _quota_cooldown_decision(
                     error_message=result.error_message,
                     now_utc=now_utc,
-                    default_minutes=cooldown_minutes,
+                    default_cooldown=quota_cooldown,
                 )
                 _apply_cooldown(ps, decision=decision, now_utc=now_utc)
-                state.set_provider_state(provider, ps)
                 pending_fallback = (provider, result)
                 break  # Go to next provider
 
             elif effective_error == ErrorClass.TRANSIENT_RATE_LIMIT:
-                if attempt < max_retries:
+                if attempt < retry_cfg.max_retries:
                     # Wait with exponential backoff, then retry the SAME provider
-                    wait = min(backoff_base ** attempt, backoff_max)
+                    wait = backoff_schedule[attempt]
+                    if retry_cfg.jitter:
+                        wait = random.uniform(0, wait)
+                    # A server hint overrides the schedule, within backoff_max
+                    retry_after = _extract_retry_after_seconds(result.error_message)
+                    if retry_after is not None:
+                        wait = min(max(retry_after, wait), retry_cfg.backoff_max)
                     if wait > 0:
                         time.sleep(wait)
                     continue  # Retry
                 else:
                     # Exhausted retries — short cooldown, try next provider
-                    now_utc = datetime.now(timezone.utc)
                     decision = _transient_cooldown_decision(
                         now_utc=now_utc,
-                        cooldown_minutes=transient_cooldown_minutes,
+                        cooldown=transient_cooldown,
                         error_message=result.error_message,
                     )
                     _apply_cooldown(ps, decision=decision, now_utc=now_utc)
-                    state.set_provider_state(provider, ps)
                     pending_fallback = (provider, result)
                     break
 
@@ -278,11 +324,14 @@ def run_with_retry(
     return result, last_provider, state
 
 
+@lru_cache(maxsize=16)
+def _backoff_schedule(base: float, cap: float, max_retries: int) -> tuple[float, ...]:
+    """Precomputed waits for each retry attempt: min(base ** n, cap)."""
+    return tuple(min(base ** n, cap) for n in range(max_retries))
+
+
 def _looks_like_limit_exhaustion(message: Optional[str]) -> bool:
-    if not message:
-        return False
-    lower = message.lower()
-    return any(pattern in lower for pattern in _LIMIT_TEXT_PATTERNS)
+    return bool(message) and _LIMIT_TEXT_RE.search(message) is not None
 
 
 def _clear_cooldown(ps: ProviderState) -> None:
@@ -308,16 +357,22 @@ def _apply_cooldown(
 def _message_excerpt(message: Optional[str], limit: int = 240) -> Optional[str]:
     if not message:
         return None
-    normalized = " ".join(message.split())
-    if len(normalized) <= limit:
-        return normalized
-    return normalized[:limit] + "..."
+    # Collapse whitespace word by word and stop once past the limit, so a
+    # long stderr dump isn't split and re-joined in full for 240 chars.
+    words: list[str] = []
+    length = -1
+    for match in _WORD_RE.finditer(message):
+        words.append(match.group())
+        length += len(words[-1]) + 1
+        if length > limit:
+            return " ".join(words)[:limit] + "..."
+    return " ".join(words)
 
 
 def _quota_cooldown_decision(
     error_message: Optional[str],
     now_utc: datetime,
-    default_minutes: int,
+    default_cooldown: timedelta,
 ) -> _CooldownDecision:
     reset_until = _extract_reset_time_utc(error_message, now_utc)
     if reset_until and reset_until > now_utc:
@@ -329,7 +384,7 @@ def _quota_cooldown_decision(
         )
 
     return _CooldownDecision(
-        until=now_utc + timedelta(minutes=default_minutes),
+        until=now_utc + default_cooldown,
         source="quota_default",
         reason="quota-exhausted:default-cooldown",
         message_excerpt=_message_excerpt(error_message),
@@ -338,11 +393,11 @@ def _quota_cooldown_decision(
 
 def _transient_cooldown_decision(
     now_utc: datetime,
-    cooldown_minutes: int,
+    cooldown: timedelta,
     error_message: Optional[str],
 ) -> _CooldownDecision:
     return _CooldownDecision(
-        until=now_utc + timedelta(minutes=cooldown_minutes),
+        until=now_utc + cooldown,
         source="transient_retry_exhausted",
         reason="transient-rate-limit:retries-exhausted",
         message_excerpt=_message_excerpt(error_message),
@@ -358,67 +413,65 @@ def _quota_cooldown_until(
     Prefer explicit provider reset timestamps (if present in error text).
     Fall back to fixed-duration cooldown when parsing is not possible.
     """
-    return _quota_cooldown_decision(error_message, now_utc, default_minutes).until
+    return _quota_cooldown_decision(
+        error_message, now_utc, timedelta(minutes=default_minutes)
+    ).until
 
 
-def _extract_reset_time_utc(
-    message: Optional[str],
-    now_utc: datetime,
-) -> Optional[datetime]:
+def _extract_retry_after_seconds(message: Optional[str]) -> Optional[float]:
+    """Seconds the provider asked us to wait before retrying, if it said so."""
     if not message:
         return None
-
-    parsed_12h = _extract_12h_reset_time_utc(message, now_utc)
-    if parsed_12h:
-        return parsed_12h
-
-    return _extract_24h_reset_time_utc(message, now_utc)
-
-
-def _extract_12h_reset_time_utc(message: str, now_utc: datetime) -> Optional[datetime]:
-    match = _RESET_TIME_12H_PATTERN.search(message)
+    match = _RETRY_AFTER_PATTERN.search(message)
     if not match:
         return None
+    value = float(match.group("value"))
+    unit = (match.group("unit") or "s").lower()
+    if unit == "ms" or unit.startswith("milli"):
+        return value / 1000
+    return value * _RETRY_AFTER_UNIT_SECONDS[unit[0]]
 
-    try:
-        hour_12 = int(match.group("hour"))
-        minute = int(match.group("minute") or "0")
-    except ValueError:
-        return None
-    if not 1 <= hour_12 <= 12:
-        return None
 
-    ampm = (match.group("ampm") or "").lower()
-    if ampm not in {"am", "pm"}:
+def _extract_reset_time_utc(
+    message: Optional[str],
+    now_utc: datetime,
+) -> Optional[datetime]:
+    if not message:
         return None
 
-    hour_24 = (hour_12 % 12) + (12 if ampm == "pm" else 0)
-    return _build_reset_time_utc(
-        now_utc=now_utc,
-        tz_name=match.group("tz").strip(),
-        hour_24=hour_24,
-        minute=minute,
-    )
+    # A message can mention several reset times; use the first one that
+    # yields a real time (e.g. skip "13pm" or an unknown timezone).
+    for match in _RESET_TIME_PATTERN.finditer(message):
+        if match.group("ampm"):
+            hour_12 = int(match.group("h12"))
+            if not 1 <= hour_12 <= 12:
+                continue
+            pm = match.group("ampm").lower() == "pm"
+            hour_24 = (hour_12 % 12) + (12 if pm else 0)
+            minute = int(match.group("m12") or "0")
+        else:
+            hour_24 = int(match.group("h24"))
+            minute = int(match.group("m24"))
+
+        reset = _build_reset_time_utc(
+            now_utc=now_utc,
+            tz_name=match.group("tz"),
+            hour_24=hour_24,
+            minute=minute,
+        )
+        if reset is not None:
+            return reset
+    return None
 
 
-def _extract_24h_reset_time_utc(message: str, now_utc: datetime) -> Optional[datetime]:
-    match = _RESET_TIME_24H_PATTERN.search(message)
-    if not match:
-        return None
-
+@lru_cache(maxsize=64)
+def _resolve_tz(name: str) -> Optional[ZoneInfo]:
+    """ZoneInfo for `name`, or None if unknown; misses are cached too."""
     try:
-        hour_24 = int(match.group("hour"))
-        minute = int(match.group("minute"))
-    except ValueError:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
         return None
 
-    return _build_reset_time_utc(
-        now_utc=now_utc,
-        tz_name=match.group("tz").strip(),
-        hour_24=hour_24,
-        minute=minute,
-    )
-
 
 def _build_reset_time_utc(
     now_utc: datetime,
@@ -429,9 +482,8 @@ def _build_reset_time_utc(
     if not 0 <= hour_24 <= 23 or not 0 <= minute <= 59:
         return None
 
-    try:
-        tz = ZoneInfo(tz_name)
-    except ZoneInfoNotFoundError:
+    tz = _resolve_tz(tz_name.strip())
+    if tz is None:
         return None
 
     local_now = now_utc.astimezone(tz)
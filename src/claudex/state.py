@@ -7,12 +7,18 @@ works correctly in any git repo without configuration.
 
 from __future__ import annotations
 
-import json
+import atexit
+import os
+import shutil
+import threading
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
-from .models import ClaudexState
+import orjson
+
+from .models import ActiveRun, ClaudexState
 
 # ── Directory / file paths (relative to CWD) ─────────────────────────────────
 
@@ -26,6 +32,33 @@ REPO_CONFIG_FILE = CLAUDEX_DIR / "config.toml"
 # User-global config (lower priority than repo config)
 USER_CONFIG_FILE = Path.home() / ".config" / "claudex" / "config.toml"
 
+# Transcript descriptor kept open across appends, keyed by its absolute path
+_transcript_handle: Optional[tuple[str, int]] = None
+_transcript_lock = threading.Lock()
+
+# (abspath, dev, ino, mtime_ns, size) and text of the last handoff read/written
+_handoff_cache: Optional[tuple[tuple, str]] = None
+
+
+@dataclass(slots=True)
+class _StateRecord:
+    """What this process knows about one version of state.json on disk."""
+    # (abspath, dev, ino, mtime_ns, size) of that version
+    signature: tuple
+    # Its exact bytes, as read or written
+    payload: bytes
+    # payload decoded, filled in on first need
+    data: Optional[dict] = None
+    # Object last saved as this version, handed back once by load_state
+    saved: Optional[ClaudexState] = None
+
+
+# The last state.json read or written by this process
+_state_record: Optional[_StateRecord] = None
+
+# Whole-file writes and transcript lines buffered by an open StateWriteBatch
+_batch: Optional["StateWriteBatch"] = None
+
 
 # ── Directory management ──────────────────────────────────────────────────────
 
@@ -35,6 +68,134 @@ def ensure_dir() -> None:
     CLAUDEX_DIR.mkdir(exist_ok=True)
 
 
+# ── Raw file writes ───────────────────────────────────────────────────────────
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """Write all of `data` to `fd`, looping over short writes."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _write_file(
+    path: Path,
+    data: bytes,
+    on_written: Optional[Callable[[os.stat_result], None]] = None,
+) -> None:
+    """
+    Replace `path` with `data` using bare open/write/close syscalls,
+    skipping the extra fstat/lseek calls of the buffered text IO stack.
+    The data goes to a sibling temp file that is renamed over `path`, so a
+    crash mid-write never leaves a truncated file behind.
+    Inside a StateWriteBatch the write is deferred until the batch exits.
+
+    `on_written`, if given, receives the fstat of the file once written.
+    """
+    if _batch is not None:
+        _batch.files[path] = (data, on_written)
+        return
+    _write_file_now(path, data, on_written)
+
+
+def _write_file_now(
+    path: Path,
+    data: bytes,
+    on_written: Optional[Callable[[os.stat_result], None]] = None,
+    fsync: bool = False,
+) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0)
+    fd = os.open(tmp, flags, 0o644)
+    try:
+        try:
+            _write_all(fd, data)
+            if fsync:
+                os.fsync(fd)
+            st = os.fstat(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    # The rename keeps the inode, so the temp file's stat describes `path`
+    if on_written is not None:
+        on_written(st)
+
+
+class StateWriteBatch:
+    """
+    Context manager that buffers .claudex/ writes made inside it and flushes
+    them together on exit: each file is written once with its final content
+    and all transcript lines go out in a single append.
+
+    With fsync=True each file is fsync'd before its rename, the .claudex/
+    directory once after all renames, and the transcript once after the
+    final append, so the turn survives a crash once the batch exits.
+
+    Batches do not nest; an inner batch simply joins the outer one.
+    """
+
+    __slots__ = ("files", "transcript", "fsync", "_owner")
+
+    def __init__(self, fsync: bool = False) -> None:
+        self.files: dict[Path, tuple[bytes, Optional[Callable]]] = {}
+        self.transcript: list[bytes] = []
+        self.fsync = fsync
+        self._owner = False
+
+    def __enter__(self) -> "StateWriteBatch":
+        global _batch
+        if _batch is None:
+            _batch = self
+            self._owner = True
+            return self
+        return _batch
+
+    def __exit__(self, *exc_info) -> None:
+        global _batch
+        if not self._owner:
+            return
+        _batch = None
+        self._owner = False
+        self.flush()
+
+    def flush(self) -> None:
+        """Write out everything buffered so far."""
+        files, self.files = self.files, {}
+        lines, self.transcript = self.transcript, []
+        if files or lines:
+            ensure_dir()
+        for path, (data, on_written) in files.items():
+            _write_file_now(path, data, on_written, self.fsync)
+        if files and self.fsync:
+            _fsync_dir(CLAUDEX_DIR)
+        if lines:
+            with _transcript_lock:
+                fd = _transcript_fd()
+                _write_all(fd, b"".join(lines))
+                if self.fsync:
+                    os.fsync(fd)
+
+
+def _fsync_dir(path: Path) -> None:
+    """fsync a directory so renames inside it are durable."""
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _file_signature(path: Path, st: os.stat_result) -> tuple:
+    """Identify one version of a file: (abspath, dev, ino, mtime_ns, size)."""
+    return (os.path.abspath(path), st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
 # ── State read/write ──────────────────────────────────────────────────────────
 
 
@@ -42,37 +203,109 @@ def load_state() -> ClaudexState:
     """
     Load state.json from .claudex/.
     Returns a fresh default state if the file doesn't exist or is corrupt.
+
+    If state.json is still exactly what this process last saved, the saved
+    object itself is returned once, without re-reading; so a caller must not
+    keep mutating a state after saving it unless it saves it again. Other
+    loads reuse the decoded JSON while the file's signature matches, building
+    a fresh ClaudexState each time.
     """
-    if not STATE_FILE.exists():
+    global _state_record
+    try:
+        signature = _file_signature(STATE_FILE, os.stat(STATE_FILE))
+    except OSError:
         return ClaudexState()
+    record = _state_record
+    if record is not None and record.signature == signature:
+        saved, record.saved = record.saved, None
+        if saved is not None:
+            return saved
+        if record.data is None:
+            record.data = orjson.loads(record.payload)
+        return ClaudexState.from_dict(record.data)
     try:
-        return ClaudexState.model_validate_json(STATE_FILE.read_text())
+        raw = STATE_FILE.read_bytes()
+    except OSError:
+        return ClaudexState()
+    try:
+        data = orjson.loads(raw)
+        state = ClaudexState.from_dict(data)
     except Exception:
         # Corrupt / schema-changed state — start fresh rather than crash
         return ClaudexState()
+    _state_record = _StateRecord(signature, raw, data)
+    return state
+
+
+def save_state(state: ClaudexState, now: Optional[datetime] = None) -> None:
+    """
+    Persist state to .claudex/state.json, updating the updated_at timestamp.
+    Pass `now` to stamp it with a time the caller already read.
 
+    Nothing is written (and updated_at is left alone) when the state still
+    serialises to exactly what is on disk, as last read or written by this
+    process, e.g. after a turn where every provider was in cooldown.
+    """
+    record = _state_record
+    if record is not None:
+        record.saved = None
+        if _batch is None or STATE_FILE not in _batch.files:
+            if orjson.dumps(state, option=orjson.OPT_INDENT_2) == record.payload:
+                try:
+                    signature = _file_signature(STATE_FILE, os.stat(STATE_FILE))
+                except OSError:
+                    signature = None
+                if signature == record.signature:
+                    record.saved = state
+                    return
+
+    def _remember(st: os.stat_result) -> None:
+        global _state_record
+        _state_record = _StateRecord(
+            _file_signature(STATE_FILE, st), payload, saved=state
+        )
 
-def save_state(state: ClaudexState) -> None:
-    """Persist state to .claudex/state.json, updating the updated_at timestamp."""
     ensure_dir()
-    state.updated_at = datetime.now(timezone.utc)
-    STATE_FILE.write_text(state.model_dump_json(indent=2))
+    state.updated_at = now or datetime.now(timezone.utc)
+    payload = orjson.dumps(state, option=orjson.OPT_INDENT_2)
+    _write_file(STATE_FILE, payload, _remember)
 
 
 # ── Handoff read/write ────────────────────────────────────────────────────────
 
 
 def load_handoff() -> Optional[str]:
-    """Return the contents of handoff.md, or None if it doesn't exist."""
-    if not HANDOFF_FILE.exists():
+    """
+    Return the contents of handoff.md, or None if it doesn't exist.
+
+    The last handoff read or written by this process is kept in memory and
+    reused while the file's stat signature is unchanged, so a chat session
+    doesn't re-read the handoff it wrote on the previous turn.
+    """
+    global _handoff_cache
+    try:
+        signature = _file_signature(HANDOFF_FILE, os.stat(HANDOFF_FILE))
+    except FileNotFoundError:
+        return None
+    if _handoff_cache is not None and _handoff_cache[0] == signature:
+        return _handoff_cache[1]
+    try:
+        content = HANDOFF_FILE.read_text(encoding="utf-8")
+    except FileNotFoundError:
         return None
-    return HANDOFF_FILE.read_text(encoding="utf-8")
+    _handoff_cache = (signature, content)
+    return content
 
 
 def save_handoff(content: str) -> None:
     """Overwrite handoff.md with new content."""
+
+    def _remember(st: os.stat_result) -> None:
+        global _handoff_cache
+        _handoff_cache = (_file_signature(HANDOFF_FILE, st), content)
+
     ensure_dir()
-    HANDOFF_FILE.write_text(content, encoding="utf-8")
+    _write_file(HANDOFF_FILE, content.encode("utf-8"), _remember)
 
 
 # ── Transcript ────────────────────────────────────────────────────────────────
@@ -83,11 +316,56 @@ def append_transcript(entry: dict) -> None:
     Append one JSON line to transcript.ndjson.
     The transcript is append-only; never truncated.
     Entries contain: ts, provider, user_prompt, assistant_text, session_id, error.
+
+    The file is opened once with O_APPEND and reused, so each entry costs a
+    single write() instead of open/write/close.
+    """
+    line = orjson.dumps(entry, default=str, option=orjson.OPT_APPEND_NEWLINE)
+    if _batch is not None:
+        _batch.transcript.append(line)
+        return
+    with _transcript_lock:
+        _write_all(_transcript_fd(), line)
+
+
+def _transcript_fd() -> int:
     """
+    Return the cached transcript descriptor, reopening it when the working
+    directory changed or the file was deleted underneath us (e.g. `reset`).
+    Caller must hold _transcript_lock.
+    """
+    global _transcript_handle
+    path = os.path.abspath(TRANSCRIPT_FILE)
+    if _transcript_handle is not None:
+        cached_path, fd = _transcript_handle
+        if cached_path == path and os.fstat(fd).st_nlink > 0:
+            return fd
+        _close_transcript_locked()
+
     ensure_dir()
-    line = json.dumps(entry, ensure_ascii=False, default=str)
-    with TRANSCRIPT_FILE.open("a", encoding="utf-8") as f:
-        f.write(line + "\n")
+    flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_CLOEXEC", 0)
+    fd = os.open(path, flags, 0o644)
+    _transcript_handle = (path, fd)
+    return fd
+
+
+def _close_transcript_locked() -> None:
+    global _transcript_handle
+    if _transcript_handle is not None:
+        try:
+            os.close(_transcript_handle[1])
+        except OSError:
+            pass
+        _transcript_handle = None
+
+
+def close_transcript() -> None:
+    """Close the cached transcript descriptor (registered with atexit)."""
+    with _transcript_lock:
+        _close_transcript_locked()
+
+
+atexit.register(close_transcript)
 
 
 # ── Active run metadata ───────────────────────────────────────────────────────
@@ -98,22 +376,21 @@ def load_active_run() -> Optional[dict]:
     Return active run metadata from .claudex/active.json, or None if missing.
     Invalid JSON is treated as missing.
     """
-    if not ACTIVE_RUN_FILE.exists():
-        return None
     try:
-        loaded = json.loads(ACTIVE_RUN_FILE.read_text(encoding="utf-8"))
-    except (OSError, json.JSONDecodeError):
+        loaded = orjson.loads(ACTIVE_RUN_FILE.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
         return None
     return loaded if isinstance(loaded, dict) else None
 
 
-def save_active_run(entry: dict) -> None:
-    """Overwrite .claudex/active.json with the current in-flight run metadata."""
+def save_active_run(entry: ActiveRun | dict) -> None:
+    """
+    Overwrite .claudex/active.json with the current in-flight run metadata.
+    Always written immediately, even inside a StateWriteBatch, so
+    `status --active` sees the running turn.
+    """
     ensure_dir()
-    ACTIVE_RUN_FILE.write_text(
-        json.dumps(entry, ensure_ascii=False, default=str, indent=2),
-        encoding="utf-8",
-    )
+    _write_file_now(ACTIVE_RUN_FILE, orjson.dumps(entry, default=str, option=orjson.OPT_INDENT_2))
 
 
 def clear_active_run() -> None:
@@ -129,6 +406,10 @@ def clear_active_run() -> None:
 
 def clear_claudex() -> None:
     """Delete the entire .claudex/ directory (used by `claudex reset`)."""
-    import shutil
-    if CLAUDEX_DIR.exists():
+    global _handoff_cache, _state_record
+    close_transcript()
+    _handoff_cache = _state_record = None
+    try:
         shutil.rmtree(CLAUDEX_DIR)
+    except FileNotFoundError:
+        pass
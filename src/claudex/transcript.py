@@ -37,19 +37,22 @@ def record_turn(
     switch_from: Optional[str] = None,
     switch_to: Optional[str] = None,
     switch_prompt_decision: Optional[str] = None,
+    now: Optional[datetime] = None,
 ) -> None:
     """
     Append one turn to the append-only transcript.
     Called after every run_with_retry(), whether successful or not.
+    `now` overrides the entry timestamp (defaults to the current time).
+    Datetimes are left for orjson to encode as ISO-8601 when the line is written.
     """
     entry = {
-        "ts": datetime.now(timezone.utc).isoformat(),
+        "ts": now or datetime.now(timezone.utc),
         "provider": provider.value if provider else None,
         "user_prompt": user_prompt,
         "assistant_text": assistant_text,
         "session_id": session_id,
         "cooldown_until": (
-            cooldown_until.astimezone(timezone.utc).isoformat() if cooldown_until else None
+            cooldown_until.astimezone(timezone.utc) if cooldown_until else None
         ),
         "cooldown_source": cooldown_source,
         "cooldown_reason": cooldown_reason,
@@ -4,6 +4,8 @@ Tests for Claude command construction and subprocess environment wiring.
 
 from unittest.mock import MagicMock
 
+import pytest
+
 from claudex.providers.base import ProviderResult
 from claudex.providers.claude import ClaudeProvider
 
@@ -44,6 +46,8 @@ def test_command_uses_json_output_and_resume(monkeypatch):
     assert "-r" in cmd and "sess_abc" in cmd
     assert "--output-format" in cmd and "json" in cmd
     assert captured["env"]["CLAUDEX_INNER_PROVIDER_CALL"] == "1"
+    with pytest.raises(TypeError):
+        captured["env"]["CLAUDEX_INNER_PROVIDER_CALL"] = "0"
 
 
 def test_command_appends_allowed_tools(monkeypatch):
@@ -85,3 +89,9 @@ def test_falls_back_to_claudecode_if_claude_not_found(monkeypatch):
     assert result.success is True
     assert calls[0][0] == "claude"
     assert calls[1][0] == "claudecode"
+
+
+def test_command_uses_configured_binary(monkeypatch):
+    provider, captured = _setup_provider(monkeypatch)
+    provider.run(prompt="hello", session_id=None, config={"claude": {"binary": "/opt/claude"}})
+    assert captured["cmd"][0] == "/opt/claude"
@@ -3,18 +3,14 @@ Tests for Claude provider output parsing.
 """
 
 import json
-from unittest.mock import MagicMock
+from types import SimpleNamespace
 
 from claudex.models import ErrorClass
 from claudex.providers.claude import ClaudeProvider
 
 
 def _proc(stdout: str, returncode: int = 0):
-    m = MagicMock()
-    m.stdout = stdout
-    m.stderr = ""
-    m.returncode = returncode
-    return m
+    return SimpleNamespace(stdout=stdout, stderr="", returncode=returncode)
 
 
 PROVIDER = ClaudeProvider()
@@ -108,3 +104,10 @@ def test_parse_error_subtype_with_empty_result_is_failure():
     assert result.success is False
     assert result.error_class == ErrorClass.OTHER_ERROR
     assert result.session_id == "sess_err"
+
+
+def test_classify_matches_patterns_case_insensitively():
+    assert PROVIDER._classify("Usage Limit Reached for this month", 1) == ErrorClass.QUOTA_EXHAUSTED
+    assert PROVIDER._classify("Error: Invalid API Key", 1) == ErrorClass.AUTH_REQUIRED
+    assert PROVIDER._classify("Server OVERLOADED", 1) == ErrorClass.TRANSIENT_RATE_LIMIT
+    assert PROVIDER._classify("segfault", 1) == ErrorClass.OTHER_ERROR
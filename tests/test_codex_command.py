@@ -2,8 +2,10 @@
 Tests for Codex command construction (flags and argument order).
 """
 
-from unittest.mock import MagicMock
+import json
+import sys
 
+from claudex.models import ErrorClass
 from claudex.providers.base import ProviderResult
 from claudex.providers.codex import CodexProvider
 
@@ -12,25 +14,42 @@ def _setup_provider(monkeypatch):
     provider = CodexProvider()
     captured: dict[str, list[str]] = {}
 
-    proc = MagicMock()
-    proc.stdout = ""
-    proc.stderr = ""
-    proc.returncode = 0
-
-    def fake_run(cmd, capture_output, text, timeout, env):
+    def fake_stream(cmd, env):
         captured["cmd"] = cmd
         captured["env"] = env
-        return proc
+        return ProviderResult(success=True, text="ok", session_id="thread_1")
 
-    monkeypatch.setattr("claudex.providers.codex.subprocess.run", fake_run)
-    monkeypatch.setattr(
-        provider,
-        "_parse_jsonl",
-        lambda _proc: ProviderResult(success=True, text="ok", session_id="thread_1"),
-    )
+    monkeypatch.setattr(provider, "_run_streaming", fake_stream)
     return provider, captured
 
 
+def _fake_codex(tmp_path, body: str) -> str:
+    script = tmp_path / "codex"
+    script.write_text(f"#!{sys.executable}\nimport sys\n{body}\n")
+    script.chmod(0o755)
+    return str(script)
+
+
+def _process_gone(pid: int, wait: float = 2.0) -> bool:
+    """
+    True once `pid` has exited (a zombie awaiting its reaper counts).
+    SIGKILL lands asynchronously, so poll for up to `wait` seconds.
+    """
+    import time
+
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                if f.read().rsplit(") ", 1)[1][0] in "ZX":
+                    return True
+        except FileNotFoundError:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+
+
 def test_command_uses_full_auto_flag(monkeypatch):
     provider, captured = _setup_provider(monkeypatch)
     provider.run(
@@ -102,3 +121,88 @@ def test_resume_command_keeps_resume_arguments(monkeypatch):
     ridx = cmd.index("resume")
     assert cmd[ridx + 1] == "sess_123"
     assert cmd[-2:] == ["--json", "continue"]
+
+
+def test_command_uses_configured_binary(monkeypatch):
+    provider, captured = _setup_provider(monkeypatch)
+    provider.run(prompt="hello", session_id=None, config={"codex": {"binary": "/opt/codex"}})
+    assert captured["cmd"][:2] == ["/opt/codex", "exec"]
+
+
+def test_run_streams_jsonl_from_subprocess(tmp_path):
+    events = [
+        {"type": "thread.started", "thread_id": "thread_9"},
+        {"type": "item.completed", "item": {"type": "agent_message", "content": [{"text": "first"}]}},
+        {"type": "item.completed", "item": {"type": "agent_message", "content": [{"text": "final"}]}},
+    ]
+    lines = "".join(json.dumps(e) + "\n" for e in events)
+    binary = _fake_codex(tmp_path, f"sys.stdout.write({lines!r})\nsys.stderr.write('warn\\n')")
+
+    result = CodexProvider().run("hi", None, {"codex": {"binary": binary}})
+
+    assert result.success is True
+    assert result.text == "final"
+    assert result.session_id == "thread_9"
+    assert result.raw_output == lines + "warn\n"
+
+
+def test_run_reports_timeout(tmp_path, monkeypatch):
+    monkeypatch.setattr("claudex.providers.codex._TIMEOUT_SECONDS", 0.2)
+    binary = _fake_codex(tmp_path, "import time\ntime.sleep(30)")
+
+    result = CodexProvider().run("hi", None, {"codex": {"binary": binary}})
+
+    assert result.success is False
+    assert result.error_class == ErrorClass.OTHER_ERROR
+    assert "timed out" in result.error_message
+
+
+def test_run_timeout_kills_grandchildren_holding_the_pipes(tmp_path, monkeypatch):
+    import time
+
+    monkeypatch.setattr("claudex.providers.codex._TIMEOUT_SECONDS", 0.5)
+    pid_file = tmp_path / "helper.pid"
+    body = (
+        "import subprocess, time\n"
+        "helper = subprocess.Popen(['sleep', '30'])\n"
+        f"open({str(pid_file)!r}, 'w').write(str(helper.pid))\n"
+        "time.sleep(30)"
+    )
+    binary = _fake_codex(tmp_path, body)
+
+    started = time.monotonic()
+    result = CodexProvider().run("hi", None, {"codex": {"binary": binary}})
+
+    assert time.monotonic() - started < 5
+    assert "timed out" in result.error_message
+    assert _process_gone(int(pid_file.read_text()))
+
+
+def test_run_times_out_when_a_helper_outlives_codex(tmp_path, monkeypatch):
+    import time
+
+    monkeypatch.setattr("claudex.providers.codex._TIMEOUT_SECONDS", 0.5)
+    binary = _fake_codex(tmp_path, "import subprocess\nsubprocess.Popen(['sleep', '30'])")
+
+    started = time.monotonic()
+    result = CodexProvider().run("hi", None, {"codex": {"binary": binary}})
+
+    assert time.monotonic() - started < 5
+    assert "timed out" in result.error_message
+
+
+def test_run_keeps_only_the_tail_of_raw_output(tmp_path):
+    from claudex.providers.base import RAW_OUTPUT_LIMIT
+
+    body = (
+        "for i in range(2000): print('progress line %d ' % i + 'x' * 100)\n"
+        "sys.stderr.write('fatal: boom\\n')\n"
+        "sys.exit(1)"
+    )
+    binary = _fake_codex(tmp_path, body)
+
+    result = CodexProvider().run("hi", None, {"codex": {"binary": binary}})
+
+    assert result.success is False
+    assert len(result.raw_output) == RAW_OUTPUT_LIMIT
+    assert result.raw_output.endswith("fatal: boom\n")
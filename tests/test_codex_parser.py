@@ -3,7 +3,7 @@ Tests for the Codex JSONL event stream parser (CodexProvider._parse_jsonl).
 """
 
 import json
-from unittest.mock import MagicMock
+from types import SimpleNamespace
 
 import pytest
 
@@ -15,12 +15,8 @@ from claudex.providers.codex import CodexProvider
 
 
 def _proc(stdout: str, returncode: int = 0):
-    """Build a minimal CompletedProcess-like mock."""
-    m = MagicMock()
-    m.stdout = stdout
-    m.stderr = ""
-    m.returncode = returncode
-    return m
+    """Build a minimal CompletedProcess-like stand-in."""
+    return SimpleNamespace(stdout=stdout, stderr="", returncode=returncode)
 
 
 def _jsonl(*events) -> str:
@@ -96,6 +92,37 @@ def test_parse_uses_last_agent_message():
     assert result.text == "Final answer."
 
 
+def test_parse_skips_trailing_events_without_assistant_text():
+    """Later non-message items must not hide the last agent_message."""
+    stdout = _jsonl(
+        {
+            "type": "item.completed",
+            "item": {"type": "agent_message", "content": [{"text": "Answer."}]},
+        },
+        {"type": "item.completed", "item": {"type": "command_execution", "command": "ls"}},
+        {"type": "item.completed", "item": {"type": "agent_message", "content": []}},
+        {"type": "turn.completed", "usage": {"output_tokens": 12}},
+    )
+    result = PROVIDER._parse_jsonl(_proc(stdout))
+    assert result.success is True
+    assert result.text == "Answer."
+
+
+def test_parse_keeps_answer_pushed_out_of_candidate_window():
+    """An answer followed by many text-less candidate lines is still found."""
+    noise = {"type": "item.completed", "item": {"type": "tool_output", "message": "ok"}}
+    stdout = _jsonl(
+        {
+            "type": "item.completed",
+            "item": {"type": "agent_message", "content": [{"text": "Early."}]},
+        },
+        *[noise] * 50,
+    )
+    result = PROVIDER._parse_jsonl(_proc(stdout))
+    assert result.success is True
+    assert result.text == "Early."
+
+
 def test_parse_session_id_from_id_field():
     """Supports 'id' as a fallback field name for the thread id."""
     stdout = _jsonl(
@@ -126,54 +153,29 @@ def test_parse_ignores_non_json_lines():
 # ── Error cases ───────────────────────────────────────────────────────────────
 
 
-def test_parse_quota_exhausted_error():
+@pytest.mark.parametrize(
+    "message, status, expected",
+    [
+        ("quota exhausted for this billing period", 429, ErrorClass.QUOTA_EXHAUSTED),
+        ("rate limit exceeded, please retry", 429, ErrorClass.TRANSIENT_RATE_LIMIT),
+        (
+            "You've hit your limit · resets 6pm (America/Los_Angeles)",
+            429,
+            ErrorClass.QUOTA_EXHAUSTED,
+        ),
+        ("unauthorized — check your authentication", 401, ErrorClass.AUTH_REQUIRED),
+        ("internal server error", 500, ErrorClass.OTHER_ERROR),
+    ],
+    ids=["quota", "rate-limit", "hit-your-limit", "auth", "generic"],
+)
+def test_parse_error_event_classified(message, status, expected):
     stdout = _jsonl(
         {"type": "thread.started", "thread_id": "t1"},
-        {"type": "error", "message": "quota exhausted for this billing period", "status": 429},
-    )
-    result = PROVIDER._parse_jsonl(_proc(stdout, returncode=1))
-    assert result.success is False
-    assert result.error_class == ErrorClass.QUOTA_EXHAUSTED
-
-
-def test_parse_transient_rate_limit():
-    stdout = _jsonl(
-        {"type": "error", "message": "rate limit exceeded, please retry", "status": 429},
-    )
-    result = PROVIDER._parse_jsonl(_proc(stdout, returncode=1))
-    assert result.success is False
-    assert result.error_class == ErrorClass.TRANSIENT_RATE_LIMIT
-
-
-def test_parse_quota_hit_your_limit_error():
-    stdout = _jsonl(
-        {
-            "type": "error",
-            "message": "You've hit your limit · resets 6pm (America/Los_Angeles)",
-            "status": 429,
-        },
-    )
-    result = PROVIDER._parse_jsonl(_proc(stdout, returncode=1))
-    assert result.success is False
-    assert result.error_class == ErrorClass.QUOTA_EXHAUSTED
-
-
-def test_parse_auth_error():
-    stdout = _jsonl(
-        {"type": "error", "message": "unauthorized — check your authentication", "status": 401},
-    )
-    result = PROVIDER._parse_jsonl(_proc(stdout, returncode=1))
-    assert result.success is False
-    assert result.error_class == ErrorClass.AUTH_REQUIRED
-
-
-def test_parse_generic_error():
-    stdout = _jsonl(
-        {"type": "error", "message": "internal server error", "status": 500},
+        {"type": "error", "message": message, "status": status},
     )
     result = PROVIDER._parse_jsonl(_proc(stdout, returncode=1))
     assert result.success is False
-    assert result.error_class == ErrorClass.OTHER_ERROR
+    assert result.error_class == expected
 
 
 def test_parse_error_with_structured_message():
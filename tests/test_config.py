@@ -2,6 +2,8 @@
 Tests for layered config loading and TOML parse resilience.
 """
 
+import pytest
+
 import claudex.config as config_module
 
 
@@ -15,7 +17,7 @@ def test_load_config_ignores_malformed_repo_toml(isolated_dir, monkeypatch):
     monkeypatch.setattr(config_module, "REPO_CONFIG_FILE", repo_cfg)
 
     cfg = config_module.load_config()
-    assert cfg["provider_order"] == ["claude", "codex"]
+    assert cfg["provider_order"] == ("claude", "codex")
     assert cfg["retry"]["cooldown_minutes"] == 60
 
 
@@ -49,6 +51,84 @@ def test_load_config_merges_user_then_repo(isolated_dir, monkeypatch):
     monkeypatch.setattr(config_module, "REPO_CONFIG_FILE", repo_cfg)
 
     cfg = config_module.load_config()
-    assert cfg["provider_order"] == ["codex", "claude"]
+    assert cfg["provider_order"] == ("codex", "claude")
     assert cfg["codex"]["model"] == "o4-mini"
     assert cfg["retry"]["max_retries"] == 4
+
+
+def test_load_config_is_memoized_until_file_changes(isolated_dir, monkeypatch):
+    repo_dir = isolated_dir / ".claudex"
+    repo_dir.mkdir()
+    repo_cfg = repo_dir / "config.toml"
+    repo_cfg.write_text("[retry]\nmax_retries = 1\n")
+
+    monkeypatch.setattr(config_module, "USER_CONFIG_FILE", isolated_dir / "user.toml")
+    monkeypatch.setattr(config_module, "REPO_CONFIG_FILE", repo_cfg)
+
+    first = config_module.load_config()
+    assert config_module.load_config() is first
+    assert first["retry"]["max_retries"] == 1
+
+    repo_cfg.write_text("[retry]\nmax_retries = 10\n")
+    second = config_module.load_config()
+    assert second is not first
+    assert second["retry"]["max_retries"] == 10
+
+
+def test_load_config_result_is_read_only(isolated_dir, monkeypatch):
+    monkeypatch.setattr(config_module, "USER_CONFIG_FILE", isolated_dir / "user.toml")
+    monkeypatch.setattr(config_module, "REPO_CONFIG_FILE", isolated_dir / "repo.toml")
+
+    cfg = config_module.reload_config()
+    with pytest.raises(TypeError):
+        cfg["retry"]["max_retries"] = 99
+    assert config_module.DEFAULT_CONFIG["retry"]["max_retries"] == 3
+
+
+def test_load_config_lists_are_immutable(isolated_dir, monkeypatch):
+    user_cfg = isolated_dir / "user.toml"
+    user_cfg.write_text('[claude]\nallowed_tools = ["Bash"]\n')
+    monkeypatch.setattr(config_module, "USER_CONFIG_FILE", user_cfg)
+    monkeypatch.setattr(config_module, "REPO_CONFIG_FILE", isolated_dir / "repo.toml")
+
+    cfg = config_module.reload_config()
+    assert cfg["claude"]["allowed_tools"] == ("Bash",)
+    with pytest.raises(AttributeError):
+        cfg["provider_order"].append("x")
+    with pytest.raises(AttributeError):
+        cfg["claude"]["allowed_tools"].append("Edit")
+    assert config_module.DEFAULT_CONFIG["provider_order"] == ("claude", "codex")
+    assert config_module.load_config()["claude"]["allowed_tools"] == ("Bash",)
+
+
+def test_load_config_returns_frozen_defaults_without_overrides(isolated_dir, monkeypatch):
+    monkeypatch.setattr(config_module, "USER_CONFIG_FILE", isolated_dir / "user.toml")
+    monkeypatch.setattr(config_module, "REPO_CONFIG_FILE", isolated_dir / "repo.toml")
+
+    assert config_module.reload_config() is config_module.DEFAULT_CONFIG
+
+
+def test_merge_config_replaces_leaves_and_merges_tables():
+    base = config_module.DEFAULT_CONFIG
+    merged = config_module._merge_config(
+        base,
+        {"retry": {"max_retries": 7}, "provider_order": ["codex"], "extra": {"a": 1}},
+    )
+    assert merged["retry"]["max_retries"] == 7
+    assert merged["retry"]["backoff_base"] == 2.0
+    assert merged["provider_order"] == ["codex"]
+    assert merged["extra"] == {"a": 1}
+    assert merged["limits"] is base["limits"]
+    assert base["retry"]["max_retries"] == 3
+
+
+def test_section_configs_fall_back_to_defaults():
+    retry = config_module.RetryConfig.from_dict({"retry": {"max_retries": 1}})
+    assert retry.max_retries == 1
+    assert retry.backoff_max == 30.0
+    assert retry.transient_cooldown_minutes == 5
+
+    limits = config_module.LimitsConfig.from_dict({})
+    assert limits.max_diff_lines == 200
+    assert limits.max_diff_bytes == 8_000
+    assert limits.max_handoff_lines == 350
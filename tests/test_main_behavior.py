@@ -1,12 +1,20 @@
+import os
+
+import pytest
+
 from claudex.main import (
     AutoSwitchPolicy,
     _coerce_auto_switch,
+    _excerpt,
     _extract_real_provider_bin_from_wrapper,
     _find_real_binary,
     _is_claudex_wrapper,
+    _print_response,
     _real_binary_for_provider,
+    _resolve_auto_switch,
     _write_wrapper,
     _with_preferred_provider,
+    _with_resolved_binaries,
     _wrapper_script,
 )
 from claudex.models import Provider
@@ -15,9 +23,18 @@ from claudex.models import Provider
 def test_with_preferred_provider_moves_provider_first():
     cfg = {"provider_order": ["claude", "codex"], "retry": {}}
     merged = _with_preferred_provider(cfg, Provider.CODEX)
-    assert merged["provider_order"] == ["codex", "claude"]
+    assert merged["provider_order"] == ("codex", "claude")
     # Original dict should remain unchanged.
     assert cfg["provider_order"] == ["claude", "codex"]
+    assert merged["retry"] is cfg["retry"]
+
+
+def test_with_preferred_provider_ignores_unknown_configured_names():
+    cfg = {"provider_order": ["gemini", "codex"]}
+    assert _with_preferred_provider(cfg, Provider.CLAUDE)["provider_order"] == ("claude", "codex")
+    assert _with_preferred_provider(cfg, None) is cfg
+    matching = {"provider_order": ["claude", "codex"]}
+    assert _with_preferred_provider(matching, Provider.CLAUDE) is matching
 
 
 def test_coerce_auto_switch_aliases():
@@ -25,6 +42,15 @@ def test_coerce_auto_switch_aliases():
     assert _coerce_auto_switch("never") == AutoSwitchPolicy.NO
     assert _coerce_auto_switch("ask") == AutoSwitchPolicy.ASK
     assert _coerce_auto_switch("unknown") == AutoSwitchPolicy.ASK
+    assert _coerce_auto_switch(" YES ") == AutoSwitchPolicy.YES
+    assert _coerce_auto_switch(AutoSwitchPolicy.NO) is AutoSwitchPolicy.NO
+
+
+def test_resolve_auto_switch_handles_non_string_config_values():
+    assert _resolve_auto_switch(None, {"switch": {"confirmation": True}}) == AutoSwitchPolicy.YES
+    assert _resolve_auto_switch(None, {"switch": {"confirmation": 0}}) == AutoSwitchPolicy.ASK
+    assert _resolve_auto_switch(None, {}) == AutoSwitchPolicy.ASK
+    assert _resolve_auto_switch(AutoSwitchPolicy.NO, {"switch": {"confirmation": "yes"}}) == AutoSwitchPolicy.NO
 
 
 def test_wrapper_script_prefers_requested_provider():
@@ -38,6 +64,8 @@ def test_wrapper_script_prefers_requested_provider():
     assert "CLAUDEX_INNER_PROVIDER_CALL" in claude_script
     assert 'if [ "$#" -gt 0 ] && [ "${1#-}" != "$1" ]; then' in codex_script
     assert '-- "$@"' in codex_script
+    assert codex_script.startswith("#!/bin/sh\n")
+    assert codex_script.index("CLAUDEX_WRAPPER") < 32
 
 
 def test_write_wrapper_marks_file_as_claudex_wrapper(isolated_dir):
@@ -113,3 +141,192 @@ def test_extract_real_provider_bin_rejects_self_reference(isolated_dir):
     )
     wrapper.chmod(0o755)
     assert _extract_real_provider_bin_from_wrapper(wrapper) is None
+
+
+def test_is_claudex_wrapper_only_checks_file_head(isolated_dir):
+    late_marker = isolated_dir / "late"
+    late_marker.write_bytes(b"\0" * 4096 + b"CLAUDEX_WRAPPER")
+    assert _is_claudex_wrapper(late_marker) is False
+    huge = isolated_dir / "huge"
+    huge.write_bytes(b"#!/bin/sh\n# CLAUDEX_WRAPPER\n" + b"\0" * (64 * 1024))
+    assert _is_claudex_wrapper(huge) is False
+    assert _is_claudex_wrapper(isolated_dir / "missing") is False
+
+
+def test_excerpt_collapses_whitespace_and_truncates():
+    assert _excerpt("  fix\tthe\n\n  bug \x1c now ") == "fix the bug now"
+    assert _excerpt("word " * 100, max_len=9) == "word word..."
+    assert _excerpt("ab cd", max_len=5) == "ab cd"
+    assert _excerpt("ab cd ef", max_len=5) == "ab cd..."
+
+
+def test_print_response_writes_raw_markdown_when_piped(capsys):
+    _print_response("# Title\n\n```py\nx = 1\n```")
+    assert capsys.readouterr().out == "# Title\n\n```py\nx = 1\n```\n"
+
+
+def test_with_resolved_binaries_overlays_found_binaries(monkeypatch, isolated_dir):
+    monkeypatch.setattr(
+        "claudex.main._real_binary_for_provider",
+        lambda p, _dir: "/real/codex" if p == Provider.CODEX else None,
+    )
+    cfg = {"codex": {"model": "o4-mini"}, "claude": {"allowed_tools": ["Read"]}}
+    merged = _with_resolved_binaries(cfg, isolated_dir)
+    assert merged["codex"]["binary"] == "/real/codex"
+    assert merged["codex"]["model"] == "o4-mini"
+    assert merged["claude"].get("binary") is None
+    assert "binary" not in cfg["codex"]
+
+
+def test_with_resolved_binaries_keeps_explicit_binary(monkeypatch, isolated_dir):
+    monkeypatch.setattr("claudex.main._real_binary_for_provider", lambda p, _dir: None)
+    cfg = {"claude": {"binary": "/mine/claude"}}
+    assert _with_resolved_binaries(cfg, isolated_dir) is cfg
+
+
+def test_find_real_binary_skips_directories_and_non_executables(isolated_dir, monkeypatch):
+    first, second, third = (isolated_dir / d for d in ("a", "b", "c"))
+    (first / "codex").mkdir(parents=True)
+    second.mkdir()
+    (second / "codex").write_text("not executable")
+    third.mkdir()
+    real = third / "codex"
+    real.write_text("#!/bin/sh\nexit 0\n")
+    real.chmod(0o755)
+
+    monkeypatch.setenv("PATH", os.pathsep.join(["", str(first), str(second), str(third)]))
+    assert _find_real_binary("codex", isolated_dir) == str(real)
+
+
+def test_run_turn_records_one_transcript_entry_per_outcome(monkeypatch, isolated_dir):
+    import json
+
+    import claudex.main as main_module
+    from claudex.models import ErrorClass
+    from claudex.providers.base import ProviderResult
+
+    outcomes = [
+        ProviderResult(success=True, text="hi there", session_id="sess_1"),
+        ProviderResult(
+            success=False,
+            error_class=ErrorClass.OTHER_ERROR,
+            error_message="boom",
+            session_id="sess_2",
+        ),
+    ]
+
+    def fake_run_with_retry(*, user_prompt, state, on_provider_start, **_kwargs):
+        on_provider_start(Provider.CLAUDE)
+        state.claude.session_id = "sess_1"
+        return outcomes.pop(0), Provider.CLAUDE, state
+
+    monkeypatch.setattr("claudex.router.run_with_retry", fake_run_with_retry)
+    assert main_module._run_turn("first", {}) == (True, Provider.CLAUDE)
+    assert main_module._run_turn("second", {}) == (False, Provider.CLAUDE)
+
+    lines = (isolated_dir / ".claudex" / "transcript.ndjson").read_text().splitlines()
+    ok, failed = (json.loads(line) for line in lines)
+    assert ok["assistant_text"] == "hi there" and ok["error"] is None
+    assert ok["session_id"] == "sess_1"
+    assert failed["assistant_text"] is None
+    assert failed["error"] == "OTHER_ERROR: boom"
+    assert failed["session_id"] == "sess_2"
+    assert (isolated_dir / ".claudex" / "handoff.md").exists()
+    state = json.loads((isolated_dir / ".claudex" / "state.json").read_text())
+    # The failed turn left state untouched, so only the first turn wrote it
+    assert state["updated_at"] == ok["ts"]
+
+
+@pytest.mark.parametrize("enabled, expected_syncs", [(False, 0), (True, 4)])
+def test_run_turn_fsyncs_only_when_configured(
+    isolated_dir, monkeypatch, enabled, expected_syncs
+):
+    import claudex.main as main_module
+    from claudex.providers.base import ProviderResult
+
+    def fake_run_with_retry(*, user_prompt, state, on_provider_start, **_kwargs):
+        return ProviderResult(success=True, text="ok"), Provider.CLAUDE, state
+
+    synced: list[int] = []
+    monkeypatch.setattr("claudex.router.run_with_retry", fake_run_with_retry)
+    monkeypatch.setattr("claudex.state.os.fsync", synced.append)
+    main_module._run_turn("hi", {"state": {"fsync": enabled}})
+    # state.json + handoff.md + the .claudex/ directory + the transcript
+    assert len(synced) == expected_syncs
+
+
+def test_print_response_only_parses_markdown_when_it_looks_like_markdown(monkeypatch, capsys):
+    import io
+
+    from rich.console import Console
+
+    import claudex.main as main_module
+
+    terminal = Console(file=io.StringIO(), force_terminal=True, color_system=None, width=80)
+    monkeypatch.setattr(main_module, "_get_consoles", lambda: (terminal, terminal))
+
+    import rich.markdown
+
+    real_markdown = rich.markdown.Markdown
+
+    def no_markdown(*_args, **_kwargs):
+        raise AssertionError("plain text should not be parsed as Markdown")
+
+    monkeypatch.setattr(rich.markdown, "Markdown", no_markdown)
+    _print_response("Plain answer: 42 apples, nothing fancy.")
+    assert "42 apples" in terminal.file.getvalue()
+
+    monkeypatch.setattr(rich.markdown, "Markdown", real_markdown)
+
+    terminal.file = io.StringIO()
+    _print_response("# Heading\n\nSome **bold** text.")
+    rendered = terminal.file.getvalue()
+    assert "Heading" in rendered
+    assert "**" not in rendered
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Plain answer: 42 apples, nothing fancy.",
+        "Plain answer with a trailing newline.\n",
+        "a long sentence " * 12,
+        "first line\nsecond line of the same paragraph",
+        "one\n\n\n\ntwo",
+        "salt &amp; pepper",
+        "path\\.name",
+        "    indented code",
+        "intro\n\n    code block",
+    ],
+)
+def test_print_response_matches_markdown_rendering(monkeypatch, text):
+    import io
+
+    from rich.console import Console
+    from rich.markdown import Markdown
+
+    import claudex.main as main_module
+
+    def _console():
+        return Console(file=io.StringIO(), force_terminal=True, color_system=None, width=40)
+
+    terminal = _console()
+    monkeypatch.setattr(main_module, "_get_consoles", lambda: (terminal, terminal))
+    _print_response(text)
+
+    reference = _console()
+    reference.print(Markdown(text, code_theme="ansi_dark"))
+
+    def _lines(console):
+        return [line.rstrip() for line in console.file.getvalue().splitlines()]
+
+    assert _lines(terminal) == _lines(reference)
+
+
+def test_write_wrapper_adds_exec_bits_to_existing_file(isolated_dir):
+    path = isolated_dir / "codex"
+    path.write_text("old")
+    path.chmod(0o600)
+    _write_wrapper(path, "#!/bin/sh\n")
+    assert path.read_text() == "#!/bin/sh\n"
+    assert path.stat().st_mode & 0o111 == 0o111
@@ -19,3 +19,14 @@ def test_ask_accepts_unquoted_multi_word_prompt(monkeypatch):
     result = RUNNER.invoke(main_module.app, ["ask", "help", "me", "with", "task"])
     assert result.exit_code == 0
     assert captured["prompt"] == "help me with task"
+
+
+def test_ask_rejects_blank_prompt_before_loading_anything(monkeypatch):
+    def fail(*_args, **_kwargs):
+        raise AssertionError("should not be called")
+
+    monkeypatch.setattr(main_module, "_run_turn", fail)
+    monkeypatch.setattr(main_module, "load_config", fail)
+
+    result = RUNNER.invoke(main_module.app, ["ask", "   "])
+    assert result.exit_code == 2
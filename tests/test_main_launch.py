@@ -1,3 +1,5 @@
+import os
+
 from typer.testing import CliRunner
 
 import claudex.main as main_module
@@ -18,13 +20,13 @@ def test_launch_picks_available_provider_and_execs(monkeypatch):
 
     captured = {}
 
-    def fake_execvpe(binary, argv, env):
+    def fake_execve(binary, argv, env):
         captured["binary"] = binary
         captured["argv"] = argv
         captured["env"] = env
         raise SystemExit(0)
 
-    monkeypatch.setattr(main_module.os, "execvpe", fake_execvpe)
+    monkeypatch.setattr(main_module.os, "execve", fake_execve)
 
     result = RUNNER.invoke(main_module.app, ["launch", "--prefer-provider", "claude"])
     assert result.exit_code == 0
@@ -49,13 +51,13 @@ def test_launch_falls_back_and_sets_codex_recursion_guard(monkeypatch):
 
     captured = {}
 
-    def fake_execvpe(binary, argv, env):
+    def fake_execve(binary, argv, env):
         captured["binary"] = binary
         captured["argv"] = argv
         captured["env"] = env
         raise SystemExit(0)
 
-    monkeypatch.setattr(main_module.os, "execvpe", fake_execvpe)
+    monkeypatch.setattr(main_module.os, "execve", fake_execve)
 
     result = RUNNER.invoke(
         main_module.app,
@@ -83,13 +85,13 @@ def test_launch_skips_provider_with_missing_binary(monkeypatch):
 
     captured = {}
 
-    def fake_execvpe(binary, argv, env):
+    def fake_execve(binary, argv, env):
         captured["binary"] = binary
         captured["argv"] = argv
         captured["env"] = env
         raise SystemExit(0)
 
-    monkeypatch.setattr(main_module.os, "execvpe", fake_execvpe)
+    monkeypatch.setattr(main_module.os, "execve", fake_execve)
 
     result = RUNNER.invoke(main_module.app, ["launch", "--prefer-provider", "claude"])
     assert result.exit_code == 0
@@ -188,3 +190,22 @@ def test_install_wrappers_refuses_in_place_codex_overwrite(monkeypatch, isolated
     )
     assert result.exit_code == 1
     assert "Refusing to overwrite the real codex binary in-place" in result.output
+
+
+def test_uninstall_wrappers_removes_only_claudex_wrappers(isolated_dir):
+    wrapper_dir = isolated_dir / "bin"
+    main_module._write_wrapper(
+        wrapper_dir / "codex",
+        main_module._wrapper_script(Provider.CODEX, real_provider_bin="/real/codex"),
+    )
+    (wrapper_dir / "claude").write_text("#!/bin/sh\necho real\n")
+    (wrapper_dir / "claudecode").mkdir()
+
+    assert os.access(wrapper_dir / "codex", os.X_OK)
+    result = RUNNER.invoke(main_module.app, ["uninstall-wrappers", "--dir", str(wrapper_dir)])
+
+    assert result.exit_code == 0
+    assert not (wrapper_dir / "codex").exists()
+    assert (wrapper_dir / "claude").exists()
+    assert (wrapper_dir / "claudecode").is_dir()
+    assert "Skipping non-claudex file" in result.output
@@ -1,34 +1,93 @@
 from datetime import datetime, timedelta, timezone
 
-from claudex.main import _format_cooldown, _format_cooldown_source, _format_cooldown_until
-from claudex.models import ProviderState
+from typer.testing import CliRunner
 
+import claudex.main as main_module
+from claudex.main import _cooldown_fields
+from claudex.models import ClaudexState, ProviderState
 
-def test_format_cooldown_ready_returns_dash():
+
+def test_cooldown_fields_ready_returns_dashes():
     now = datetime(2026, 2, 27, 23, 0, tzinfo=timezone.utc)
-    assert _format_cooldown(ProviderState(), now) == "—"
+    assert _cooldown_fields(ProviderState(), now) == ("—", "—", "—")
 
 
-def test_format_cooldown_includes_remaining_until_and_source():
+def test_cooldown_fields_include_remaining_until_and_source():
     now = datetime(2026, 2, 27, 23, 0, tzinfo=timezone.utc)
     ps = ProviderState(
         cooldown_until=now + timedelta(minutes=90),
         cooldown_source="quota_reset_time",
     )
 
-    rendered = _format_cooldown(ps, now)
-    until = _format_cooldown_until(ps, now)
-    source = _format_cooldown_source(ps, now)
+    rendered, until, source = _cooldown_fields(ps, now)
     assert "90 min" in rendered
     assert "2026-02-28 00:30 UTC" in until
     assert source == "quota_reset_time"
 
 
-def test_format_cooldown_source_hidden_when_cooldown_expired():
+def test_cooldown_fields_hidden_when_cooldown_expired():
     now = datetime(2026, 2, 27, 23, 0, tzinfo=timezone.utc)
     ps = ProviderState(
         cooldown_until=now - timedelta(minutes=1),
         cooldown_source="quota_reset_time",
     )
-    assert _format_cooldown_until(ps, now) == "—"
-    assert _format_cooldown_source(ps, now) == "—"
+    assert _cooldown_fields(ps, now) == ("—", "—", "—")
+
+
+def test_status_prints_tab_separated_rows_when_piped(monkeypatch):
+    state = ClaudexState()
+    state.codex = ProviderState(
+        session_id="thread_1",
+        cooldown_until=datetime.now(timezone.utc) + timedelta(hours=1),
+        cooldown_source="quota_default",
+    )
+    monkeypatch.setattr(main_module, "load_config", lambda: {"provider_order": ["claude", "codex"]})
+    monkeypatch.setattr(main_module, "load_state", lambda: state)
+
+    result = CliRunner().invoke(main_module.app, ["status"])
+
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert lines[0] == (
+        "provider\tstatus\tsession_id\tlast_used\tcooldown\tcooldown_until\tcooldown_source"
+    )
+    claude_row = lines[1].split("\t")
+    codex_row = lines[2].split("\t")
+    assert claude_row == ["claude", "ready", "", "", "", "", ""]
+    assert codex_row[:3] == ["codex", "cooldown", "thread_1"]
+    assert codex_row[-1] == "quota_default"
+    # Anything after the rows is a '#' comment, never another data line
+    assert lines[3:] and all(line.startswith("# ") for line in lines[3:])
+    assert "—" not in result.output
+
+
+def test_status_active_piped_keeps_header_first(isolated_dir, monkeypatch):
+    monkeypatch.setattr(main_module, "load_config", lambda: {"provider_order": ["claude", "codex"]})
+    monkeypatch.setattr(main_module, "load_state", lambda: ClaudexState())
+    monkeypatch.setattr(main_module, "load_active_run", lambda: {"pid": 42, "mode": "ask"})
+
+    result = CliRunner().invoke(main_module.app, ["status", "--active"])
+
+    lines = result.output.splitlines()
+    assert lines[0].startswith("provider\tstatus\t")
+    assert "# active_turn: running" in lines
+    assert "# pid: 42" in lines
+
+
+def test_status_renders_aligned_grid_on_terminal(monkeypatch, capsys):
+    from rich.console import Console
+
+    state = ClaudexState()
+    state.claude = ProviderState(session_id="sess_[abc]")
+    terminal = Console(force_terminal=True, color_system=None, width=200)
+    monkeypatch.setattr(main_module, "_get_consoles", lambda: (terminal, terminal))
+    monkeypatch.setattr(main_module, "load_config", lambda: {"provider_order": ["claude", "codex"]})
+    monkeypatch.setattr(main_module, "load_state", lambda: state)
+
+    main_module.status(active=False)
+
+    lines = capsys.readouterr().out.splitlines()
+    header = next(line for line in lines if line.startswith("Provider"))
+    claude_row = next(line for line in lines if line.startswith("claude"))
+    assert claude_row.index("✓ ready") == header.index("Status")
+    assert "sess_[abc]…" in claude_row
@@ -14,6 +14,12 @@ from claudex.models import ClaudexState, ErrorClass, Provider, ProviderState
 from claudex.providers.base import ProviderResult
 from claudex.router import (
     PROVIDERS,
+    _backoff_schedule,
+    _extract_reset_time_utc,
+    _extract_retry_after_seconds,
+    _looks_like_limit_exhaustion,
+    _message_excerpt,
+    _get_provider,
     _quota_cooldown_until,
     get_available_providers,
     run_with_retry,
@@ -43,8 +49,8 @@ def _ok(text="response", session_id="s1") -> ProviderResult:
     return ProviderResult(success=True, text=text, session_id=session_id)
 
 
-def _err(cls: ErrorClass) -> ProviderResult:
-    return ProviderResult(success=False, error_class=cls, error_message="err")
+def _err(cls: ErrorClass, message: str = "err") -> ProviderResult:
+    return ProviderResult(success=False, error_class=cls, error_message=message)
 
 
 def _mock_provider(result: ProviderResult) -> MagicMock:
@@ -334,6 +340,105 @@ def test_transient_cooldown_uses_config_value(isolated_dir):
     assert state.claude.cooldown_reason == "transient-rate-limit:retries-exhausted"
 
 
+def test_get_provider_creates_singletons_lazily():
+    with patch.dict(PROVIDERS, clear=True):
+        codex = _get_provider(Provider.CODEX)
+        assert type(codex).__name__ == "CodexProvider"
+        assert _get_provider(Provider.CODEX) is codex
+        assert Provider.CLAUDE not in PROVIDERS
+
+
+def test_looks_like_limit_exhaustion_is_case_insensitive():
+    assert _looks_like_limit_exhaustion("You have hit your LIMIT for this Billing Period")
+    assert _looks_like_limit_exhaustion("see https://Claude.ai/settings/limits")
+    assert not _looks_like_limit_exhaustion("segmentation fault")
+    assert not _looks_like_limit_exhaustion(None)
+
+
+@pytest.mark.parametrize(
+    "message",
+    ["", "  \n ", "short  error\n\ttext", "word " * 100, "x" * 500, ("a " * 119) + "bcd efg"],
+)
+def test_message_excerpt_matches_full_normalisation(message):
+    normalized = " ".join(message.split())
+    expected = normalized if len(normalized) <= 240 else normalized[:240] + "..."
+    assert _message_excerpt(message) == (expected if message else None)
+
+
+def test_backoff_schedule_is_capped():
+    assert _backoff_schedule(2.0, 5.0, 4) == (1.0, 2.0, 4.0, 5.0)
+
+
+def test_backoff_waits_are_fully_jittered(isolated_dir, monkeypatch):
+    config = dict(BASE_CONFIG)
+    config["retry"] = dict(BASE_CONFIG["retry"], backoff_base=2.0, backoff_max=30.0)
+    waits: list[float] = []
+    monkeypatch.setattr("claudex.router.time.sleep", waits.append)
+    monkeypatch.setattr("claudex.router.random.uniform", lambda lo, hi: (lo + hi) / 2)
+
+    claude_mock = MagicMock()
+    claude_mock.run.side_effect = [_err(ErrorClass.TRANSIENT_RATE_LIMIT)] * 2 + [_ok()]
+    with patch.dict(PROVIDERS, {Provider.CLAUDE: claude_mock}):
+        result, _, _ = run_with_retry("hi", ClaudexState(), config)
+
+    assert result.success is True
+    assert waits == [0.5, 1.0]
+
+
+def test_backoff_without_jitter_uses_schedule(isolated_dir, monkeypatch):
+    config = dict(BASE_CONFIG)
+    config["retry"] = dict(BASE_CONFIG["retry"], backoff_base=2.0, backoff_max=30.0, jitter=False)
+    waits: list[float] = []
+    monkeypatch.setattr("claudex.router.time.sleep", waits.append)
+
+    claude_mock = MagicMock()
+    claude_mock.run.side_effect = [_err(ErrorClass.TRANSIENT_RATE_LIMIT)] * 2 + [_ok()]
+    with patch.dict(PROVIDERS, {Provider.CLAUDE: claude_mock}):
+        run_with_retry("hi", ClaudexState(), config)
+
+    assert waits == [1.0, 2.0]
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        ("429: Retry-After: 12", 12.0),
+        ("Rate limited, try again in 2 seconds.", 2.0),
+        ("overloaded; retry after 1.5s", 1.5),
+        ("please try again in 500ms", 0.5),
+        ("Try again in 3 minutes", 180.0),
+        ("try again in 5 hours", 18000.0),
+        ("retry in 1h", 3600.0),
+        ("Retry-After: 3 days", 259200.0),
+        ("Retry-After: 7.", 7.0),
+        ("try again in 2 weeks", None),
+        ("try again in 1.5 weeks", None),
+        ("rate limit exceeded", None),
+        (None, None),
+    ],
+)
+def test_extract_retry_after_seconds(message, expected):
+    assert _extract_retry_after_seconds(message) == expected
+
+
+def test_backoff_honors_server_retry_after_hint(isolated_dir, monkeypatch):
+    config = dict(BASE_CONFIG)
+    config["retry"] = dict(BASE_CONFIG["retry"], backoff_base=2.0, backoff_max=30.0, jitter=False)
+    waits: list[float] = []
+    monkeypatch.setattr("claudex.router.time.sleep", waits.append)
+
+    claude_mock = MagicMock()
+    claude_mock.run.side_effect = [
+        _err(ErrorClass.TRANSIENT_RATE_LIMIT, "rate limit: try again in 7 seconds"),
+        _err(ErrorClass.TRANSIENT_RATE_LIMIT, "Retry-After: 600"),
+        _ok(),
+    ]
+    with patch.dict(PROVIDERS, {Provider.CLAUDE: claude_mock}):
+        run_with_retry("hi", ClaudexState(), config)
+
+    assert waits == [7.0, 30.0]
+
+
 # ── run_with_retry — non-retriable errors ────────────────────────────────────
 
 
@@ -407,6 +512,48 @@ def test_quota_cooldown_falls_back_to_default_when_unparseable():
     assert cooldown_until == now + timedelta(minutes=60)
 
 
+def test_default_quota_cooldown_is_jittered(isolated_dir, monkeypatch):
+    monkeypatch.setattr("claudex.router.random.uniform", lambda lo, hi: hi)
+    config = dict(BASE_CONFIG)
+    config["retry"] = dict(BASE_CONFIG["retry"], cooldown_minutes=60)
+    claude_mock = _mock_provider(_err(ErrorClass.QUOTA_EXHAUSTED, "quota exhausted"))
+
+    before = datetime.now(timezone.utc)
+    with patch.dict(PROVIDERS, {Provider.CLAUDE: claude_mock, Provider.CODEX: _mock_provider(_ok())}):
+        _, _, state = run_with_retry("hi", ClaudexState(), config)
+
+    remaining = state.claude.cooldown_until - before
+    assert timedelta(minutes=66) <= remaining < timedelta(minutes=67)
+    assert state.claude.cooldown_source == "quota_default"
+
+
+def test_reset_time_parses_12h_with_minutes_and_24h_forms():
+    now = datetime(2026, 2, 27, 8, 0, tzinfo=timezone.utc)
+    assert _extract_reset_time_utc("resets at 9:30am (UTC)", now) == datetime(
+        2026, 2, 27, 9, 30, tzinfo=timezone.utc
+    )
+    assert _extract_reset_time_utc("Limit hit. Resets 17:45 · (UTC)", now) == datetime(
+        2026, 2, 27, 17, 45, tzinfo=timezone.utc
+    )
+    assert _extract_reset_time_utc("resets 13pm (UTC)", now) is None
+
+
+def test_reset_time_with_unknown_timezone_is_ignored():
+    now = datetime(2026, 2, 27, 23, 0, tzinfo=timezone.utc)
+    assert _extract_reset_time_utc("resets 3pm (Not/AZone)", now) is None
+    assert _extract_reset_time_utc("resets 3pm (../etc)", now) is None
+
+
+def test_reset_time_skips_unusable_matches_for_a_later_one():
+    now = datetime(2026, 2, 27, 8, 0, tzinfo=timezone.utc)
+    expected = datetime(2026, 2, 27, 14, 30, tzinfo=timezone.utc)
+    assert _extract_reset_time_utc("resets 13pm (UTC) … resets 14:30 (UTC)", now) == expected
+    assert (
+        _extract_reset_time_utc("resets 5pm (Mars/Base) then resets 14:30 (UTC)", now)
+        == expected
+    )
+
+
 def test_quota_cooldown_supports_24h_reset_time():
     now = datetime(2026, 2, 27, 23, 11, tzinfo=timezone.utc)
     cooldown_until = _quota_cooldown_until(
@@ -3,12 +3,15 @@ Tests for state.py — read/write of .claudex/{state.json, handoff.md, transcrip
 """
 
 import json
+import os
+from datetime import datetime, timezone
 from pathlib import Path
 
 import pytest
 
-from claudex.models import ClaudexState, Provider, ProviderState
+from claudex.models import ActiveRun, ClaudexState, Provider, ProviderState
 from claudex.state import (
+    StateWriteBatch,
     append_transcript,
     clear_active_run,
     clear_claudex,
@@ -51,6 +54,70 @@ def test_save_and_load_state_roundtrip(isolated_dir):
     assert loaded.codex.consecutive_errors == 2
 
 
+def test_provider_state_accessors_map_to_named_fields():
+    state = ClaudexState()
+    ps = ProviderState(session_id="thread_1")
+    state.set_provider_state(Provider.CODEX, ps)
+    assert state.codex is ps
+    assert state.get_provider_state(Provider.CODEX) is ps
+    assert state.get_provider_state(Provider.CLAUDE) is state.claude
+
+
+def test_save_state_skips_rewrite_when_nothing_changed(isolated_dir):
+    save_state(ClaudexState(turn_count=1))
+    path = isolated_dir / ".claudex" / "state.json"
+    before = path.stat()
+
+    state = load_state()
+    stamped = state.updated_at
+    save_state(state)
+    assert state.updated_at == stamped
+    assert path.stat().st_mtime_ns == before.st_mtime_ns
+
+    state = load_state()
+    state.turn_count = 2
+    save_state(state)
+    assert state.updated_at > stamped
+    assert load_state().turn_count == 2
+
+
+def test_save_state_skips_rewrite_of_unchanged_state_read_from_disk(isolated_dir):
+    import orjson
+
+    path = isolated_dir / ".claudex" / "state.json"
+    path.parent.mkdir()
+    path.write_bytes(orjson.dumps(ClaudexState(turn_count=6), option=orjson.OPT_INDENT_2))
+    before = path.stat()
+
+    state = load_state()
+    save_state(state)
+    assert path.stat().st_mtime_ns == before.st_mtime_ns
+    assert load_state() is state
+
+
+def test_save_state_rewrites_when_file_was_removed(isolated_dir):
+    state = ClaudexState(turn_count=1)
+    save_state(state)
+    (isolated_dir / ".claudex" / "state.json").unlink()
+    save_state(state)
+    assert load_state().turn_count == 1
+
+
+def test_failed_state_write_keeps_previous_file(isolated_dir, monkeypatch):
+    save_state(ClaudexState(turn_count=3))
+
+    def boom(fd, data):
+        os.write(fd, data[:5])
+        raise OSError("disk full")
+
+    monkeypatch.setattr("claudex.state._write_all", boom)
+    with pytest.raises(OSError):
+        save_state(ClaudexState(turn_count=4))
+
+    assert load_state().turn_count == 3
+    assert sorted(p.name for p in (isolated_dir / ".claudex").iterdir()) == ["state.json"]
+
+
 def test_save_state_creates_claudex_dir(isolated_dir):
     assert not (isolated_dir / ".claudex").exists()
     save_state(ClaudexState())
@@ -92,6 +159,37 @@ def test_load_state_old_schema_defaults_new_cooldown_metadata(isolated_dir):
     assert loaded.claude.cooldown_reason is None
 
 
+def test_load_state_reads_pydantic_era_timestamps(isolated_dir):
+    (isolated_dir / ".claudex").mkdir()
+    legacy = {
+        "last_provider": "codex",
+        "claude": {"cooldown_until": "2026-02-28T02:00:00Z"},
+        "codex": {"last_used": "2026-02-27T23:00:00"},
+        "turn_count": 3,
+        "created_at": "2026-02-27T20:00:00Z",
+        "updated_at": "2026-02-27T23:00:00Z",
+    }
+    (isolated_dir / ".claudex" / "state.json").write_text(json.dumps(legacy))
+
+    loaded = load_state()
+    assert loaded.last_provider == Provider.CODEX
+    assert loaded.claude.cooldown_until == datetime(2026, 2, 28, 2, 0, tzinfo=timezone.utc)
+    # Naive timestamps are interpreted as UTC.
+    assert loaded.codex.last_used == datetime(2026, 2, 27, 23, 0, tzinfo=timezone.utc)
+    assert loaded.turn_count == 3
+
+
+def test_load_state_rejects_wrong_field_types(isolated_dir):
+    (isolated_dir / ".claudex").mkdir()
+    (isolated_dir / ".claudex" / "state.json").write_text(
+        json.dumps({"turn_count": "many", "last_provider": "gpt"})
+    )
+
+    state = load_state()
+    assert state.turn_count == 0
+    assert state.last_provider is None
+
+
 def test_save_state_updates_updated_at(isolated_dir):
     from datetime import datetime, timezone
     before = datetime.now(timezone.utc)
@@ -103,6 +201,39 @@ def test_save_state_updates_updated_at(isolated_dir):
 # ── handoff ───────────────────────────────────────────────────────────────────
 
 
+def test_load_state_returns_saved_object_once(isolated_dir):
+    state = ClaudexState(turn_count=4)
+    save_state(state)
+    assert load_state() is state
+
+    reloaded = load_state()
+    assert reloaded is not state
+    assert reloaded.turn_count == 4
+
+
+def test_load_state_ignores_cache_after_external_write(isolated_dir):
+    save_state(ClaudexState(turn_count=1))
+    data = json.loads(Path(".claudex/state.json").read_text())
+    data["turn_count"] = 42
+    Path(".claudex/state.json").write_text(json.dumps(data, indent=4))
+    assert load_state().turn_count == 42
+
+
+def test_load_state_reuses_decoded_json_while_unchanged(isolated_dir, monkeypatch):
+    save_state(ClaudexState(turn_count=5))
+    load_state()
+    first = load_state()
+    first.turn_count = 99
+
+    def _no_read(self):
+        raise AssertionError("state.json re-read")
+
+    monkeypatch.setattr(Path, "read_bytes", _no_read)
+    second = load_state()
+    assert second is not first
+    assert second.turn_count == 5
+
+
 def test_load_handoff_returns_none_when_missing(isolated_dir):
     assert load_handoff() is None
 
@@ -114,6 +245,25 @@ def test_save_and_load_handoff_roundtrip(isolated_dir):
     assert loaded == content
 
 
+def test_load_handoff_reuses_content_written_by_save(isolated_dir, monkeypatch):
+    save_handoff("# cached")
+
+    def fail_read(*_args, **_kwargs):
+        raise AssertionError("handoff should not be re-read")
+
+    monkeypatch.setattr(Path, "read_text", fail_read)
+    assert load_handoff() == "# cached"
+
+
+def test_load_handoff_sees_external_edits(isolated_dir):
+    save_handoff("# ours")
+    path = Path(".claudex/handoff.md")
+    path.write_text("# edited elsewhere, longer")
+    assert load_handoff() == "# edited elsewhere, longer"
+    path.unlink()
+    assert load_handoff() is None
+
+
 def test_save_handoff_overwrites(isolated_dir):
     save_handoff("first version")
     save_handoff("second version")
@@ -149,6 +299,90 @@ def test_append_transcript_is_append_only(isolated_dir):
     assert json.loads(lines[4])["i"] == 4
 
 
+def test_append_transcript_follows_cwd_and_reset(isolated_dir, monkeypatch):
+    append_transcript({"i": 0})
+    clear_claudex()
+    append_transcript({"i": 1})
+
+    path = isolated_dir / ".claudex" / "transcript.ndjson"
+    assert [json.loads(l)["i"] for l in path.read_text().splitlines()] == [1]
+
+    other = isolated_dir / "other"
+    other.mkdir()
+    monkeypatch.chdir(other)
+    append_transcript({"i": 2})
+    assert json.loads((other / ".claudex" / "transcript.ndjson").read_text())["i"] == 2
+    assert len(path.read_text().splitlines()) == 1
+
+
+# ── write batching ────────────────────────────────────────────────────────────
+
+
+def test_state_write_batch_defers_until_exit(isolated_dir):
+    with StateWriteBatch():
+        save_handoff("first")
+        save_handoff("second")
+        save_state(ClaudexState(turn_count=3))
+        append_transcript({"n": 1})
+        append_transcript({"n": 2})
+        save_active_run({"pid": 9})
+        assert load_handoff() is None
+        assert load_state().turn_count == 0
+        assert load_active_run() == {"pid": 9}
+
+    assert load_handoff() == "second"
+    assert load_state().turn_count == 3
+    lines = Path(".claudex/transcript.ndjson").read_text().splitlines()
+    assert [json.loads(line)["n"] for line in lines] == [1, 2]
+
+
+def test_state_write_batch_flushes_on_error(isolated_dir):
+    with pytest.raises(RuntimeError):
+        with StateWriteBatch():
+            save_handoff("kept")
+            raise RuntimeError("boom")
+    assert load_handoff() == "kept"
+
+
+def test_nested_state_write_batch_joins_outer(isolated_dir):
+    with StateWriteBatch():
+        with StateWriteBatch():
+            save_handoff("inner")
+        assert load_handoff() is None
+    assert load_handoff() == "inner"
+
+
+def test_state_write_batch_fsyncs_transcript_once(isolated_dir, monkeypatch):
+    synced = []
+    monkeypatch.setattr("claudex.state.os.fsync", synced.append)
+    with StateWriteBatch(fsync=True):
+        append_transcript({"n": 1})
+        append_transcript({"n": 2})
+        assert synced == []
+    assert len(synced) == 1
+    assert len(Path(".claudex/transcript.ndjson").read_text().splitlines()) == 2
+
+
+def test_state_write_batch_fsyncs_each_file_and_dir_once(isolated_dir, monkeypatch):
+    synced = []
+    monkeypatch.setattr("claudex.state.os.fsync", synced.append)
+    with StateWriteBatch(fsync=True):
+        save_handoff("a")
+        save_handoff("b")
+        save_state(ClaudexState(turn_count=1))
+    # handoff.md + state.json + the .claudex/ directory
+    assert len(synced) == 3
+    assert load_handoff() == "b"
+
+
+def test_save_outside_batch_does_not_fsync(isolated_dir, monkeypatch):
+    synced = []
+    monkeypatch.setattr("claudex.state.os.fsync", synced.append)
+    save_handoff("a")
+    save_state(ClaudexState())
+    assert synced == []
+
+
 # ── active run metadata ───────────────────────────────────────────────────────
 
 
@@ -169,6 +403,19 @@ def test_save_and_load_active_run_roundtrip(isolated_dir):
     assert loaded["provider"] == "codex"
 
 
+def test_save_active_run_accepts_active_run_dataclass(isolated_dir):
+    run = ActiveRun(pid=7, mode="chat", started_at="2026-01-01T00:00:00+00:00", prompt_excerpt="hi")
+    run.provider = "codex"
+    save_active_run(run)
+    assert load_active_run() == {
+        "pid": 7,
+        "mode": "chat",
+        "started_at": "2026-01-01T00:00:00+00:00",
+        "prompt_excerpt": "hi",
+        "provider": "codex",
+    }
+
+
 def test_clear_active_run_removes_file(isolated_dir):
     save_active_run({"pid": 1})
     assert load_active_run() is not None
@@ -176,6 +423,12 @@ def test_clear_active_run_removes_file(isolated_dir):
     assert load_active_run() is None
 
 
+def test_load_active_run_treats_invalid_json_as_missing(isolated_dir):
+    (isolated_dir / ".claudex").mkdir()
+    (isolated_dir / ".claudex" / "active.json").write_text("{not json")
+    assert load_active_run() is None
+
+
 # ── clear_claudex ────────────────────────────────────────────────────────────
 
 
@@ -1,5 +1,5 @@
 import json
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from claudex.models import Provider
 from claudex.transcript import record_turn
@@ -32,3 +32,13 @@ def test_record_turn_persists_cooldown_metadata(isolated_dir):
     assert entry["switch_from"] == "claude"
     assert entry["switch_to"] == "codex"
     assert entry["switch_prompt_decision"] == "approved"
+
+
+def test_record_turn_timestamps_match_isoformat(isolated_dir):
+    now = datetime(2026, 2, 28, 1, 2, 3, 456789, tzinfo=timezone.utc)
+    cooldown = datetime(2026, 2, 28, 9, 0, tzinfo=timezone(timedelta(hours=7)))
+    record_turn(Provider.CODEX, "hi", "ok", cooldown_until=cooldown, now=now)
+
+    entry = json.loads((isolated_dir / ".claudex" / "transcript.ndjson").read_text())
+    assert entry["ts"] == now.isoformat()
+    assert entry["cooldown_until"] == "2026-02-28T02:00:00+00:00"
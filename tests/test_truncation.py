@@ -2,11 +2,16 @@
 Tests for truncation / line-limit utilities in handoff.py.
 """
 
+import sys
+
 import pytest
 
 from claudex.handoff import (
     _enforce_line_limit,
     _extract_section,
+    _parse_sections,
+    _run_git,
+    _run_git_batch,
     _truncate,
     get_repo_snapshot,
     update_handoff,
@@ -67,6 +72,23 @@ def test_enforce_line_limit_preserves_first_and_last_lines():
     assert "line 99" in result
 
 
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_enforce_line_limit_keeps_exact_head_and_tail(newline):
+    text = "".join(f"line {i}{newline}" for i in range(12))
+    result = _enforce_line_limit(text, 9)
+    assert result.split("\n") == [
+        "line 0",
+        "line 1",
+        "line 2",
+        "",
+        "[… 6 lines omitted to stay within the 9-line limit …]",
+        "",
+        "line 9",
+        "line 10",
+        "line 11",
+    ]
+
+
 # ── _extract_section ──────────────────────────────────────────────────────────
 
 
@@ -110,6 +132,12 @@ def test_extract_section_empty_body():
     assert result == ""
 
 
+def test_parse_sections_collects_all_level2_sections():
+    text = "# Doc\n## A\nalpha\n### nested\n## B\nbeta\n## A\nduplicate\n## C"
+    sections = _parse_sections(text)
+    assert sections == {"A": "alpha\n### nested", "B": "beta", "C": ""}
+
+
 # ── update_handoff ────────────────────────────────────────────────────────────
 
 
@@ -163,6 +191,18 @@ do something
     assert "Build a REST API." in result
 
 
+def test_update_handoff_keeps_braces_in_exchange_text():
+    result = update_handoff(
+        user_prompt="format {name}",
+        assistant_text="use {0} or {{escaped}}",
+        provider="codex",
+        config={},
+    )
+    assert "format {name}" in result
+    assert "use {0} or {{escaped}}" in result
+    assert "**codex responded:**" in result
+
+
 def test_update_handoff_respects_line_limit():
     config = {"limits": {"max_handoff_lines": 20}}
     long_text = "word " * 2000
@@ -188,12 +228,15 @@ def test_get_repo_snapshot_skips_full_diff_when_numstat_exceeds_limit(monkeypatc
         ("git", "diff", "--numstat"): "250\t0\tbig.py\n",
     }
 
-    def fake_run_git(cmd: list[str]) -> str:
+    def fake_run_git(cmd: list[str], max_bytes=None) -> str:
         key = tuple(cmd)
         calls.append(key)
         return outputs.get(key, "")
 
     monkeypatch.setattr("claudex.handoff._run_git", fake_run_git)
+    monkeypatch.setattr(
+        "claudex.handoff._run_git_batch", lambda cmds: [fake_run_git(c) for c in cmds]
+    )
 
     snapshot = get_repo_snapshot({"limits": {"max_diff_lines": 200, "max_diff_bytes": 8000}})
 
@@ -209,17 +252,88 @@ def test_get_repo_snapshot_includes_full_diff_when_under_limits(monkeypatch):
         ("git", "log", "-n", "5", "--oneline"): "abc123 first commit\n",
         ("git", "diff", "--stat"): " src/app.py | 2 +-\n",
         ("git", "diff", "--numstat"): "1\t1\tsrc/app.py\n",
-        ("git", "diff"): "--- a/src/app.py\n+++ b/src/app.py\n@@ -1 +1 @@\n-old\n+new\n",
+        ("git", "diff"): b"--- a/src/app.py\n+++ b/src/app.py\n@@ -1 +1 @@\n-old\n+new\n",
     }
 
-    def fake_run_git(cmd: list[str]) -> str:
+    def fake_run_git(cmd: list[str], max_bytes=None) -> str:
         key = tuple(cmd)
         calls.append(key)
         return outputs.get(key, "")
 
     monkeypatch.setattr("claudex.handoff._run_git", fake_run_git)
+    monkeypatch.setattr(
+        "claudex.handoff._run_git_batch", lambda cmds: [fake_run_git(c) for c in cmds]
+    )
 
     snapshot = get_repo_snapshot({"limits": {"max_diff_lines": 200, "max_diff_bytes": 8000}})
 
     assert "**Full diff:**" in snapshot
     assert ("git", "diff") in calls
+
+
+def test_get_repo_snapshot_probes_work_tree_once_per_cwd(isolated_dir, monkeypatch):
+    inside = {"answer": b""}
+    probes: list[str] = []
+
+    def fake_run_git(cmd: list[str], max_bytes=None):
+        if cmd[1] == "rev-parse":
+            probes.append(cmd[1])
+            return inside["answer"]
+        return b""
+
+    monkeypatch.setattr("claudex.handoff._run_git", fake_run_git)
+    monkeypatch.setattr(
+        "claudex.handoff._run_git_batch", lambda cmds: [fake_run_git(c) for c in cmds]
+    )
+
+    # Negative answers are not cached
+    assert get_repo_snapshot({}) == ""
+    inside["answer"] = b"true\n"
+    assert get_repo_snapshot({}).startswith("## Repo Snapshot")
+    assert get_repo_snapshot({}).startswith("## Repo Snapshot")
+    assert len(probes) == 2
+
+
+def test_run_git_returns_none_when_output_exceeds_max_bytes():
+    cmd = [sys.executable, "-c", "print('x' * 5000)"]
+    assert _run_git(cmd, max_bytes=100) is None
+    assert _run_git(cmd) == b"x" * 5000 + b"\n"
+
+
+def test_run_git_batch_preserves_command_order():
+    outputs = _run_git_batch(
+        [
+            [sys.executable, "-c", "print('first')"],
+            ["definitely-not-a-real-binary-xyz"],
+            [sys.executable, "-c", "print('third')"],
+        ]
+    )
+    assert outputs == ["first\n", "", "third\n"]
+
+
+def test_run_git_returns_empty_string_on_failure():
+    assert _run_git([sys.executable, "-c", "import sys; sys.exit(1)"]) == b""
+    assert _run_git(["definitely-not-a-real-binary-xyz"]) == b""
+
+
+def test_get_repo_snapshot_omits_diff_over_byte_budget(monkeypatch):
+    outputs = {
+        ("git", "rev-parse", "--is-inside-work-tree"): "true\n",
+        ("git", "diff", "--numstat"): "10\t0\tsrc/app.py\n",
+    }
+
+    def fake_run_git(cmd: list[str], max_bytes=None):
+        if cmd == ["git", "diff"]:
+            assert max_bytes == 8000
+            return None
+        return outputs.get(tuple(cmd), "")
+
+    monkeypatch.setattr("claudex.handoff._run_git", fake_run_git)
+    monkeypatch.setattr(
+        "claudex.handoff._run_git_batch", lambda cmds: [fake_run_git(c) for c in cmds]
+    )
+
+    snapshot = get_repo_snapshot({"limits": {"max_diff_lines": 200, "max_diff_bytes": 8000}})
+
+    assert "exceeds the 8000-byte limit" in snapshot
+    assert "**Full diff:**" not in snapshot